@@ -0,0 +1,169 @@
+import asyncio
+from datetime import datetime
+from urllib.parse import parse_qs
+
+from asgiref.wsgi import WsgiToAsgi
+
+from app import create_app
+from app.cache import make_key
+from app.foodbasket import FoodbasketError
+from app.routes import SALES_FIELDS
+from app.sync import synced_pages
+
+flask_app = create_app()
+wsgi_app = WsgiToAsgi(flask_app)
+
+# Daily-sales routes served natively on the event loop
+ASYNC_ROUTES = {
+    "/orders-daily-voucher-sales": ("orders", "voucher"),
+    "/invoices-daily-voucher-sales": ("invoices", "voucher"),
+    "/orders-daily-bis-sales": ("orders", "bis"),
+    "/invoices-daily-bis-sales": ("invoices", "bis"),
+}
+
+JSON_HEADERS = [(b"content-type", b"application/json")]
+# Records encoded per body chunk
+STREAM_CHUNK_RECORDS = 1000
+
+# Records of the fetch being read on this worker's loop, by cache key
+_in_flight = {}
+
+
+async def _start_response(send):
+    await send(
+        {"type": "http.response.start", "status": 200, "headers": JSON_HEADERS}
+    )
+
+
+async def _send_body(send, body, more_body=False):
+    await send(
+        {"type": "http.response.body", "body": body.encode(), "more_body": more_body}
+    )
+
+
+async def _send_json(send, body):
+    await _start_response(send)
+    await _send_body(send, body)
+
+
+async def _synced_pages(entity, fields, filters):
+    """
+    Read a daily-sales fetch through the same cache and snapshot as Flask.
+
+    synced_pages coalesces fetches across threads and workers, and syncs the
+    current day incrementally. It blocks, so each page is read in a thread and
+    yielded as it arrives. Concurrent requests for the same fetch on this loop
+    await the first request's records instead of each tying up a thread to
+    wait on it, and read for themselves if that request stops early.
+
+    Yields:
+        list: Pages of records.
+    """
+    key = make_key(entity, fields, filters)
+    while key in _in_flight:
+        # A client that disconnects must not cancel the read for the others
+        records = await asyncio.shield(_in_flight[key])
+        if records is not None:
+            yield records
+            return
+
+    shared = _in_flight[key] = asyncio.get_running_loop().create_future()
+    records = []
+    pages = step = None
+    try:
+        pages = await asyncio.to_thread(synced_pages, entity, fields, filters)
+        while True:
+            # Shielded so a cancelled request still lets the page finish
+            # before the iterator is closed below
+            step = asyncio.ensure_future(asyncio.to_thread(next, pages, None))
+            page = await asyncio.shield(step)
+            if page is None:
+                break
+            records.extend(page)
+            yield page
+        shared.set_result(records)
+    except Exception as e:
+        shared.set_exception(e)
+        # Retrieve it here as well; no other request may be waiting for it
+        shared.exception()
+        raise
+    finally:
+        del _in_flight[key]
+        if not shared.done():
+            shared.set_result(None)
+        if step is not None and not step.done():
+            await asyncio.wait([step])
+        if pages is not None:
+            await asyncio.to_thread(pages.close)
+
+
+async def daily_sales(send, entity, payment_method):
+    """
+    Stream a daily-sales JSON array without holding a worker thread.
+
+    Behaves like the Flask route, sharing its cache, single-flight coalescing
+    and incremental snapshot: early failures return the usual error object,
+    and the records are sent in chunks of STREAM_CHUNK_RECORDS as their pages
+    arrive.
+    """
+    current_date = datetime.now().strftime("%Y-%m-%d")
+    filters = {
+        "startDate": current_date,
+        "endDate": current_date,
+        "paymentMethods": payment_method,
+    }
+    dumps = flask_app.json.dumps
+
+    pages = _synced_pages(entity, SALES_FIELDS[payment_method], filters)
+    try:
+        try:
+            page = await anext(pages, None)
+        except FoodbasketError as e:
+            await _send_json(send, dumps(e.error))
+            return
+
+        await _start_response(send)
+        separator = "["
+        while page is not None:
+            for start in range(0, len(page), STREAM_CHUNK_RECORDS):
+                chunk = page[start : start + STREAM_CHUNK_RECORDS]
+                await _send_body(send, separator + dumps(chunk)[1:-1], True)
+                separator = ","
+            page = await anext(pages, None)
+        await _send_body(send, "[]" if separator == "[" else "]")
+    finally:
+        await pages.aclose()
+
+
+async def lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+
+async def application(scope, receive, send):
+    """
+    ASGI entry point.
+
+    The four daily-sales routes are served on the event loop: concurrent
+    requests for the same day share one read of the cache and snapshot
+    instead of each occupying a thread. Everything else, including file
+    exports requested with `format`, is handed to the Flask app.
+    """
+    if scope["type"] == "lifespan":
+        await lifespan(receive, send)
+        return
+
+    route = ASYNC_ROUTES.get(scope.get("path"))
+    if scope["type"] == "http" and scope["method"] == "GET" and route:
+        # Only JSON is streamed natively; file exports go through Flask
+        query = parse_qs(scope.get("query_string", b"").decode("latin-1"))
+        if query.get("format", ["json"]) == ["json"]:
+            await daily_sales(send, *route)
+            return
+
+    await wsgi_app(scope, receive, send)
@@ -0,0 +1,85 @@
+import base64
+import io
+import zipfile
+
+from config import Config
+
+
+def _encode(filename, data):
+    return {"content": base64.b64encode(data).decode("ascii"), "filename": filename}
+
+
+def _zip(files):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", compression=zipfile.ZIP_DEFLATED) as bundle:
+        for filename, data in files:
+            bundle.writestr(filename, data)
+    return buffer.getvalue()
+
+
+def _group(files, budget, sizes=None):
+    """Split files, in order, into groups whose total size stays within budget."""
+    if sizes is None:
+        sizes = [len(data) for _, data in files]
+    groups, group, total = [], [], 0
+    for file, size in zip(files, sizes):
+        if group and total + size > budget:
+            groups.append(group)
+            group, total = [], 0
+        group.append(file)
+        total += size
+    if group:
+        groups.append(group)
+    return groups
+
+
+def package(attachments, bundle_name):
+    """
+    Pick the cheapest encoding for a set of attachments and fit it to emails.
+
+    Small reports are attached as they are. From REPORT_COMPRESS_MIN_BYTES on,
+    the files are also bundled into a zip, which is used when it saves at least
+    REPORT_MIN_COMPRESSION_SAVING of the size. Either way the files are then
+    grouped so no email carries more than REPORT_MAX_EMAIL_BYTES, with one zip
+    per email when zipping. A single file larger than the budget still gets an
+    email of its own; render reports in parts (REPORT_MAX_FILE_ROWS) to avoid
+    that.
+
+    Args:
+        attachments (list): Attachments with base64 "content" and "filename".
+        bundle_name (str): File name of the zip bundle, e.g. "Reports.zip".
+
+    Returns:
+        list: One list of attachments per email, in order.
+    """
+    files = [
+        (attachment["filename"], base64.b64decode(attachment["content"]))
+        for attachment in attachments
+    ]
+    raw_size = sum(len(data) for _, data in files)
+    budget = Config.REPORT_MAX_EMAIL_BYTES
+
+    if raw_size >= Config.REPORT_COMPRESS_MIN_BYTES:
+        # Group by compressed size so each bundle fits the budget
+        zipped = [_zip([file]) for file in files]
+        groups = _group(files, budget, [len(bundle) for bundle in zipped])
+        bundles = [
+            zipped[files.index(group[0])] if len(group) == 1 else _zip(group)
+            for group in groups
+        ]
+        zipped_size = sum(len(bundle) for bundle in bundles)
+        if zipped_size <= raw_size * (1 - Config.REPORT_MIN_COMPRESSION_SAVING):
+            if len(bundles) == 1:
+                return [[_encode(bundle_name, bundles[0])]]
+            stem = bundle_name.removesuffix(".zip")
+            return [
+                [_encode(f"{stem}_{part}.zip", bundle)]
+                for part, bundle in enumerate(bundles, start=1)
+            ]
+
+    if raw_size <= budget:
+        return [list(attachments)]
+    return [
+        [_encode(filename, data) for filename, data in group]
+        for group in _group(files, budget)
+    ]
@@ -0,0 +1,16 @@
+"""
+Celery beat entry point.
+
+    celery -A app.beat beat --loglevel=info
+
+Beat only publishes the scheduled task names, so unlike app.make_celery it does
+not build the Flask app: no routes are registered, the database and mail are
+not set up and the task modules are never imported.
+"""
+
+from celery import Celery
+
+from app.celery import celery_config
+
+celery_app = Celery("app")
+celery_app.config_from_object(celery_config(include=()))
@@ -0,0 +1,310 @@
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+
+from redis.exceptions import RedisError
+
+from app import jsonutil, singleflight
+from app.foodbasket import iter_data_in_batches
+from app.redis_client import get_redis
+from config import Config
+
+KEY_PREFIX = "foodbasket:cache"
+# Bumped on invalidation so every worker drops its in-memory entries. Kept
+# outside KEY_PREFIX so invalidating the cache does not reset it.
+GENERATION_KEY = "foodbasket:cache-generation"
+
+
+class LRUCache:
+    """
+    Thread-safe in-memory cache with LRU eviction and per-entry expiry.
+
+    Args:
+        max_bytes (int): Total size of the entries kept before the least
+            recently used ones are evicted.
+    """
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, _, value = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, size, ttl=None):
+        """
+        Store a value, evicting the least recently used entries to make room.
+
+        Args:
+            key (str): The cache key.
+            value (object): The value to store.
+            size (int): The value's size in bytes; values larger than
+                max_bytes are not stored.
+            ttl (float, optional): Seconds to keep the entry.
+        """
+        expires_at = None if ttl is None else time.monotonic() + ttl
+        with self._lock:
+            self._remove(key)
+            if size > self.max_bytes:
+                return
+            self._entries[key] = (expires_at, size, value)
+            self._size += size
+            while self._size > self.max_bytes:
+                _, (_, evicted_size, _) = self._entries.popitem(last=False)
+                self._size -= evicted_size
+
+    def delete(self, key):
+        with self._lock:
+            self._remove(key)
+
+    def delete_prefix(self, prefix):
+        with self._lock:
+            keys = [key for key in self._entries if key.startswith(prefix)]
+            for key in keys:
+                self._remove(key)
+        return len(keys)
+
+    def _remove(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._size -= entry[1]
+
+
+memory_cache = LRUCache(Config.CACHE_MAX_BYTES)
+
+
+def make_key(entity, fields=None, filters=None):
+    """
+    Build the cache key for a fetch.
+
+    Args:
+        entity (str): The type of data ("orders" or "invoices").
+        fields (str, optional): Comma-separated fields.
+        filters (dict, optional): The fetch filters.
+
+    Returns:
+        str: A key namespaced by entity so entries can be invalidated per entity.
+    """
+    digest = hashlib.sha1(
+        json.dumps([fields, filters or {}], sort_keys=True).encode()
+    ).hexdigest()
+    return f"{KEY_PREFIX}:{entity}:{digest}"
+
+
+def ttl_for(filters):
+    """
+    Pick how long a fetch may be cached.
+
+    Days that have closed no longer change and are cached without expiry;
+    anything reaching today or later uses the short CACHE_TODAY_TTL.
+
+    Args:
+        filters (dict, optional): The fetch filters.
+
+    Returns:
+        int | None: Seconds to keep the entry, or None to keep it indefinitely.
+    """
+    end_date = (filters or {}).get("endDate")
+    today = datetime.now().strftime("%Y-%m-%d")
+    if end_date and end_date < today:
+        return None
+    return Config.CACHE_TODAY_TTL
+
+
+def _redis():
+    return get_redis() if Config.CACHE_REDIS_ENABLED else None
+
+
+def _entity(key):
+    # Keys look like "foodbasket:cache:<entity>:<digest>[:<suffix>]"
+    return key[len(KEY_PREFIX) + 1 :].split(":", 1)[0]
+
+
+def generation(key):
+    """
+    Read the invalidation generation that applies to a cache key.
+
+    The generation is shared through Redis whether or not the cache itself is,
+    so DELETE /cache on one worker makes every worker drop its memory entries.
+
+    Args:
+        key (str): The cache key.
+
+    Returns:
+        tuple | None: The global and per-entity generation, or None if Redis
+            cannot be read, in which case memory entries are trusted as is.
+    """
+    client = get_redis()
+    if client is None:
+        return None
+    try:
+        current = client.hmget(GENERATION_KEY, "*", _entity(key))
+    except RedisError:
+        return None
+    return tuple(int(value or 0) for value in current)
+
+
+def get(key):
+    """
+    Look up a cached value in memory, then in Redis.
+
+    Args:
+        key (str): The cache key.
+
+    Returns:
+        object | None: The cached value, or None on a miss.
+    """
+    current = generation(key)
+    entry = memory_cache.get(key)
+    if entry is not None:
+        stored_generation, value = entry
+        if current is None or stored_generation == current:
+            return value
+
+    client = _redis()
+    if client is None:
+        return None
+    try:
+        raw, ttl = client.pipeline().get(key).ttl(key).execute()
+    except RedisError:
+        return None
+    if raw is None:
+        return None
+    value = jsonutil.loads(raw)
+    # Promote into memory for the rest of the entry's lifetime
+    memory_cache.set(key, (current, value), len(raw), ttl if ttl and ttl > 0 else None)
+    return value
+
+
+def set(key, value, ttl=None, read_generation=None):
+    """
+    Store a value in memory and, when enabled, in Redis.
+
+    Args:
+        key (str): The cache key.
+        value (object): A JSON-serializable value.
+        ttl (int, optional): Seconds to keep the entry; None keeps it indefinitely.
+        read_generation (tuple, optional): The generation the value was read
+            at. If the cache has been invalidated since, the value is stale
+            and not stored.
+    """
+    current = generation(key)
+    if read_generation is not None and current is not None:
+        if read_generation != current:
+            return
+
+    raw = jsonutil.dumps(value)
+    memory_cache.set(key, (current, value), len(raw), ttl)
+
+    client = _redis()
+    if client is None:
+        return
+    try:
+        client.set(key, raw, ex=ttl)
+    except RedisError:
+        pass
+
+
+def delete(key):
+    """
+    Drop a single cached value from this worker's memory and from Redis.
+
+    Args:
+        key (str): The cache key.
+    """
+    memory_cache.delete(key)
+
+    client = _redis()
+    if client is None:
+        return
+    try:
+        client.delete(key)
+    except RedisError:
+        pass
+
+
+def invalidate(entity=None):
+    """
+    Drop cached fetches for one entity, or for every entity.
+
+    Other workers drop their memory entries on their next read, once they see
+    the bumped generation.
+
+    Args:
+        entity (str, optional): The type of data to invalidate.
+
+    Returns:
+        int: Number of entries removed from this worker's memory and Redis.
+    """
+    prefix = f"{KEY_PREFIX}:{entity}:" if entity else f"{KEY_PREFIX}:"
+    removed = memory_cache.delete_prefix(prefix)
+
+    client = get_redis()
+    if client is not None:
+        try:
+            client.hincrby(GENERATION_KEY, entity or "*", 1)
+        except RedisError:
+            pass
+
+    client = _redis()
+    if client is None:
+        return removed
+    try:
+        keys = list(client.scan_iter(match=f"{prefix}*"))
+        if keys:
+            removed += client.delete(*keys)
+    except RedisError:
+        pass
+    return removed
+
+
+def cached_pages(entity, fields=None, filters=None, concurrency=None):
+    """
+    Stream pages for a fetch, served from the cache when possible.
+
+    On a miss the pages come from iter_data_in_batches as they arrive and the
+    full result is cached once the last page has been read, so a failed or
+    abandoned fetch is never stored. Concurrent misses for the same key, in
+    this process or in other workers, wait for that fetch and get its records
+    as a single page instead of fetching again.
+
+    Args:
+        entity (str): The type of data to fetch ("orders" or "invoices").
+        fields (str, optional): Comma-separated fields to fetch.
+        filters (dict, optional): Additional filters.
+        concurrency (int, optional): Maximum number of pages in flight on a
+            miss. Defaults to Config.FOODBASKET_FETCH_CONCURRENCY.
+
+    Returns:
+        iterator: Pages of records, as from iter_data_in_batches.
+    """
+    key = make_key(entity, fields, filters)
+    cached = get(key)
+    if cached is not None:
+        return iter([cached])
+
+    def fetch_and_store():
+        read_generation = generation(key)
+        records = []
+        for data_batch in iter_data_in_batches(
+            entity, fields=fields, filters=filters, concurrency=concurrency
+        ):
+            records.extend(data_batch)
+            yield data_batch
+        set(key, records, ttl_for(filters), read_generation)
+
+    return singleflight.stream(key, fetch_and_store)
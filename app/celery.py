@@ -1,6 +1,39 @@
 from celery import Celery, Task
+from celery.schedules import crontab
 from flask import Flask
 
+from config import Config
+
+
+def celery_config(include=("app.tasks",)):
+    """
+    Build the Celery settings shared by the workers and beat.
+
+    Args:
+        include (iterable): Task modules imported when a worker starts. Beat
+            only publishes task names and passes none.
+
+    Returns:
+        dict: The Celery configuration.
+    """
+    return dict(
+        broker_url=Config.CELERY_BROKER_URL,
+        result_backend=Config.CELERY_RESULT_BACKEND,
+        task_ignore_result=True,
+        beat_schedule={
+            "prewarm_daily_report": {
+                "task": "prewarm_daily_report",
+                "schedule": crontab(hour=Config.REPORT_PREWARM_HOUR, minute=00),
+            },
+            "daily_report": {
+                "task": "daily_report",
+                "schedule": crontab(hour=10, minute=00),
+            },
+        },
+        include=list(include),
+        timezone=Config.CELERY_TIMEZONE,
+    )
+
 
 def celery_init_app(app: Flask) -> Celery:
     class FlaskTask(Task):
@@ -0,0 +1,69 @@
+from app import jsonutil
+from app.redis_client import get_redis
+from config import Config
+
+KEY_PREFIX = "daily-report"
+
+
+def _client():
+    client = get_redis()
+    if client is None:
+        raise RuntimeError("The daily report pipeline needs REDIS_URL for checkpoints.")
+    return client
+
+
+def _key(report_date, parts):
+    return ":".join([KEY_PREFIX, report_date, *parts])
+
+
+def save(report_date, *parts, value):
+    """
+    Checkpoint the output of a completed pipeline stage.
+
+    Checkpoints live in Redis next to the Celery results and expire after
+    REPORT_CHECKPOINT_TTL, so a retried or re-triggered run for the same
+    report date resumes from the stage that failed.
+
+    Args:
+        report_date (str): The report date ("YYYY-MM-DD").
+        *parts (str): The stage and its identifiers (e.g., "page", "bis", "0").
+        value (object): A JSON-serializable value.
+    """
+    _client().set(
+        _key(report_date, parts), jsonutil.dumps(value), ex=Config.REPORT_CHECKPOINT_TTL
+    )
+
+
+def load(report_date, *parts):
+    """
+    Read a stage checkpoint.
+
+    Args:
+        report_date (str): The report date ("YYYY-MM-DD").
+        *parts (str): The stage and its identifiers.
+
+    Returns:
+        object | None: The checkpointed value, or None if the stage has not run.
+    """
+    raw = _client().get(_key(report_date, parts))
+    return None if raw is None else jsonutil.loads(raw)
+
+
+def exists(report_date, *parts):
+    """Return whether a stage checkpoint is present."""
+    return bool(_client().exists(_key(report_date, parts)))
+
+
+def clear(report_date):
+    """
+    Drop every checkpoint of a report date so the next run starts over.
+
+    Args:
+        report_date (str): The report date ("YYYY-MM-DD").
+
+    Returns:
+        int: Number of checkpoints removed.
+    """
+    client = _client()
+    keys = list(client.scan_iter(match=_key(report_date, ["*"])))
+    return client.delete(*keys) if keys else 0
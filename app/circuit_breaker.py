@@ -0,0 +1,72 @@
+import threading
+import time
+
+from requests.exceptions import RequestException
+
+
+class CircuitOpenError(RequestException):
+    """Raised when a host's circuit breaker stays open for too long."""
+
+
+class CircuitBreaker:
+    """
+    Per-host circuit breaker.
+
+    After `failure_threshold` consecutive failures the circuit opens and calls
+    are held back for `reset_timeout` seconds. The first call after that is let
+    through as a trial: success closes the circuit, failure opens it again. A
+    trial that is never settled stops blocking others after `reset_timeout`.
+
+    Args:
+        host (str): The host the breaker protects, used in error messages.
+        failure_threshold (int): Consecutive failures that open the circuit.
+        reset_timeout (float): Seconds to wait before allowing a trial call.
+    """
+
+    def __init__(self, host, failure_threshold, reset_timeout):
+        self.host = host
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at = None
+        self._trial_in_flight = False
+        self._trial_started_at = None
+        self._lock = threading.Lock()
+
+    def before_request(self):
+        """
+        Check whether a call may go through now.
+
+        Returns:
+            float: 0 if the call may go through, otherwise the seconds to wait
+                before asking again.
+        """
+        with self._lock:
+            if self._opened_at is None:
+                return 0
+            now = time.monotonic()
+            remaining = self._opened_at + self.reset_timeout - now
+            if remaining > 0:
+                return remaining
+            if (
+                self._trial_in_flight
+                and now - self._trial_started_at < self.reset_timeout
+            ):
+                # Another caller's trial decides; check back shortly
+                return min(self.reset_timeout, 1.0)
+            self._trial_in_flight = True
+            self._trial_started_at = now
+            return 0
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._trial_in_flight or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+            self._trial_in_flight = False
@@ -0,0 +1,124 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from app import metrics
+from config import Config
+
+# Resend accepts up to 100 emails per batch call, none with attachments
+BATCH_SIZE = 100
+
+
+class RateLimiter:
+    """
+    Spaces out calls so no more than `rate` start per second, across threads.
+
+    Args:
+        rate (float): Calls per second; 0 or less disables the limit.
+    """
+
+    def __init__(self, rate):
+        self.interval = 1 / rate if rate > 0 else 0
+        self._next = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Block until the next call may start."""
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next)
+            self._next = start + self.interval
+        if start > now:
+            time.sleep(start - now)
+
+
+class DeliveryError(Exception):
+    """
+    Raised when some messages could not be sent.
+
+    Attributes:
+        failed (list): The ids of the messages that failed.
+    """
+
+    def __init__(self, failed):
+        super().__init__(f"{len(failed)} message(s) failed to send: {failed}")
+        self.failed = failed
+
+
+def _send_one(client, message, limiter):
+    limiter.acquire()
+    with metrics.timed(metrics.RESEND_SEND_SECONDS):
+        response = client.Emails.send(message)
+    return [{"status": "sent", "id": response.get("id")}]
+
+
+def _send_batch(client, messages, limiter):
+    limiter.acquire()
+    with metrics.timed(metrics.RESEND_SEND_SECONDS):
+        response = client.Batch.send(messages)
+    return [{"status": "sent", "id": sent.get("id")} for sent in response["data"]]
+
+
+def deliver(messages, status=None, on_result=None):
+    """
+    Send many emails through Resend, skipping the ones already sent.
+
+    Messages with attachments are sent one per call; the rest go through the
+    batch API in groups of BATCH_SIZE. Calls run on a thread pool of
+    RESEND_SEND_CONCURRENCY threads behind a RESEND_RATE_LIMIT calls/second
+    limiter. Attachments are passed by reference, so an attachment shared by
+    many messages is only built and encoded once.
+
+    Args:
+        messages (dict): Resend send params keyed by a stable message id.
+        status (dict, optional): Delivery status from an earlier attempt, keyed
+            by message id; messages whose status is "sent" are skipped.
+        on_result (callable, optional): Called as on_result(message_id, result)
+            in the calling thread as each message completes, e.g. to checkpoint
+            progress.
+
+    Returns:
+        dict: The delivery status per message id: {"status": "sent", "id": ...}
+            or {"status": "failed", "error": ...}.
+    """
+    status = dict(status or {})
+    pending = [
+        message_id
+        for message_id in messages
+        if status.get(message_id, {}).get("status") != "sent"
+    ]
+    singles = [m for m in pending if messages[m].get("attachments")]
+    batchable = [m for m in pending if not messages[m].get("attachments")]
+
+    calls = [([message_id], _send_one, messages[message_id]) for message_id in singles]
+    for start in range(0, len(batchable), BATCH_SIZE):
+        ids = batchable[start : start + BATCH_SIZE]
+        calls.append((ids, _send_batch, [messages[m] for m in ids]))
+    if not calls:
+        return status
+
+    # The Resend SDK is only loaded by processes that send
+    import resend
+
+    resend.api_key = Config.RESEND_API_KEY
+    limiter = RateLimiter(Config.RESEND_RATE_LIMIT)
+    workers = max(1, min(Config.RESEND_SEND_CONCURRENCY, len(calls)))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            executor.submit(send, resend, payload, limiter): ids
+            for ids, send, payload in calls
+        }
+        for future in as_completed(futures):
+            ids = futures[future]
+            try:
+                results = future.result()
+            except Exception as e:
+                results = [{"status": "failed", "error": str(e)}] * len(ids)
+            for message_id, result in zip(ids, results):
+                metrics.RESEND_MESSAGES.labels(status=result["status"]).inc()
+                status[message_id] = result
+                if on_result is not None:
+                    on_result(message_id, result)
+    return status
@@ -0,0 +1,286 @@
+import base64
+import csv
+import io
+from collections import namedtuple
+from datetime import date
+from decimal import Decimal, InvalidOperation
+from itertools import chain, islice
+
+from app import metrics
+from app.reports import _column_type, _to_date, generate_excel_file
+from config import Config
+
+# Records per CSV chunk streamed to the client and per Parquet row group
+CSV_CHUNK_ROWS = 1000
+PARQUET_BATCH_ROWS = 10000
+# Amounts are stored like the sales_records columns
+PARQUET_DECIMAL_PLACES = Decimal("0.000001")
+
+Exporter = namedtuple("Exporter", ["extension", "content_type", "write"])
+
+
+def _error_row(records):
+    return [records.get("details", records.get("error"))]
+
+
+def _headers(record):
+    return list(record.keys())
+
+
+def _finish(summary):
+    # Let the caller aggregate the consumed records even without a summary sheet
+    if summary is not None:
+        summary()
+
+
+def iter_csv(records):
+    """
+    Stream records as CSV text, one chunk per CSV_CHUNK_ROWS rows.
+
+    Args:
+        records (iterable): Records to write, consumed once. The header comes
+            from the first record's keys.
+
+    Yields:
+        str: CSV text.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    records = iter(records)
+    first_record = next(records, None)
+    if first_record is None:
+        return
+
+    headers = _headers(first_record)
+    writer.writerow(headers)
+    for count, record in enumerate(chain([first_record], records), start=1):
+        writer.writerow([record.get(header, "") for header in headers])
+        if count % CSV_CHUNK_ROWS == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def write_csv(entity, records, target, summary=None):
+    """
+    Write records as UTF-8 CSV, streaming them without holding them in memory.
+
+    Args:
+        entity (str): The type of data ("orders" or "invoices"); unused by CSV.
+        records (iterable | dict): Records to write, consumed once, or an
+            error dict.
+        target (file): A binary file object.
+        summary (callable, optional): Called once the records are written; CSV
+            has no summary sheet so its rows are discarded.
+
+    Returns:
+        file: The file object.
+    """
+    text = io.TextIOWrapper(target, encoding="utf-8", newline="", write_through=True)
+    try:
+        if isinstance(records, dict):
+            csv.writer(text).writerow(_error_row(records))
+        else:
+            for chunk in iter_csv(records):
+                text.write(chunk)
+            _finish(summary)
+    finally:
+        # Leave the caller's file object open
+        text.detach()
+    return target
+
+
+def _parquet_value(column_type, value):
+    if value is None or value == "":
+        return None
+    if column_type == "date":
+        value = _to_date(value)
+        return value if isinstance(value, date) else None
+    try:
+        return Decimal(str(value)).quantize(PARQUET_DECIMAL_PLACES)
+    except InvalidOperation:
+        return None
+
+
+def _parquet_table(pa, headers, records, schema):
+    columns = []
+    for header in headers:
+        column_type = _column_type(header)
+        values = [record.get(header) for record in records]
+        if column_type:
+            values = [_parquet_value(column_type, value) for value in values]
+        field_type = schema.field(header).type if schema is not None else None
+        if field_type is None:
+            if column_type == "date":
+                field_type = pa.date32()
+            elif column_type == "decimal":
+                field_type = pa.decimal128(19, 6)
+        array = pa.array(values, type=field_type)
+        if schema is None and pa.types.is_null(array.type):
+            # No value in the first batch to infer from
+            array = pa.array(values, type=pa.string())
+        columns.append(array)
+    return pa.Table.from_arrays(columns, names=headers)
+
+
+def write_parquet(entity, records, target, summary=None):
+    """
+    Write records as Parquet, one row group per PARQUET_BATCH_ROWS records.
+
+    Dates and DocTotal/U_total_* amounts get date and decimal column types,
+    like the typed cells of the Excel export; other columns keep the types of
+    the first batch.
+
+    Args:
+        entity (str): The type of data ("orders" or "invoices"); unused.
+        records (iterable | dict): Records to write, consumed once, or an
+            error dict.
+        target (file): A binary file object.
+        summary (callable, optional): Called once the records are written; its
+            rows are discarded.
+
+    Returns:
+        file: The file object.
+    """
+    # pyarrow is only needed by Parquet exports
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    if isinstance(records, dict):
+        pq.write_table(pa.table({"error": _error_row(records)}), target)
+        return target
+
+    records = iter(records)
+    batch = list(islice(records, PARQUET_BATCH_ROWS))
+    if not batch:
+        pq.write_table(pa.table({}), target)
+        _finish(summary)
+        return target
+
+    headers = _headers(batch[0])
+    table = _parquet_table(pa, headers, batch, None)
+    schema = table.schema
+    with pq.ParquetWriter(target, schema) as writer:
+        while batch:
+            writer.write_table(table)
+            batch = list(islice(records, PARQUET_BATCH_ROWS))
+            if batch:
+                table = _parquet_table(pa, headers, batch, schema)
+    _finish(summary)
+    return target
+
+
+def write_xlsx(entity, records, target, summary=None):
+    return generate_excel_file(entity, records, target, summary)
+
+
+EXPORTERS = {
+    "xlsx": Exporter(
+        ".xlsx",
+        "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        write_xlsx,
+    ),
+    "csv": Exporter(".csv", "text/csv", write_csv),
+    "parquet": Exporter(".parquet", "application/vnd.apache.parquet", write_parquet),
+}
+
+
+def export(fmt, entity, records, target, summary=None):
+    """
+    Write records in an export format.
+
+    Args:
+        fmt (str): A key of EXPORTERS ("xlsx", "csv" or "parquet").
+        entity (str): The type of data ("orders" or "invoices").
+        records (iterable | dict): Records to write, consumed once, or an
+            error dict.
+        target (file): A binary file object.
+        summary (callable, optional): Called once the records are written;
+            returns the rows of a summary sheet (Excel only) or None.
+
+    Returns:
+        file: The file object.
+    """
+    return EXPORTERS[fmt].write(entity, records, target, summary)
+
+
+def build_attachment(fmt, entity, records, filename, summary=None):
+    """
+    Render a report in memory as a Resend attachment.
+
+    The file never touches the working directory and the bytes are handed
+    over base64 encoded, which Resend accepts in place of a list of ints.
+
+    Args:
+        fmt (str): The export format.
+        entity (str): The type of data ("orders" or "invoices").
+        records (iterable | dict): Records to write, or an error dict.
+        filename (str): The attachment file name.
+        summary (callable, optional): Rows of a summary sheet, as for export.
+
+    Returns:
+        dict: The attachment with "content" and "filename" keys.
+    """
+    buffer = io.BytesIO()
+    export(fmt, entity, records, buffer, summary)
+    metrics.REPORT_BYTES.inc(buffer.getbuffer().nbytes)
+    return {
+        "content": base64.b64encode(buffer.getbuffer()).decode("ascii"),
+        "filename": filename,
+    }
+
+
+def build_attachments(fmt, entity, records, name, summary=None, max_rows=None):
+    """
+    Render a report as one or more attachments of at most `max_rows` rows.
+
+    Parts are rendered one after the other from the same record stream and
+    named "<name>_1<ext>", "<name>_2<ext>", ...; a report that fits in one part
+    is named "<name><ext>". The summary goes into the last part.
+
+    Args:
+        fmt (str): The export format.
+        entity (str): The type of data ("orders" or "invoices").
+        records (iterable): Records to write, consumed once.
+        name (str): The attachment file name without extension.
+        summary (callable, optional): Rows of a summary sheet, as for export.
+        max_rows (int, optional): Records per file. Defaults to
+            Config.REPORT_MAX_FILE_ROWS; 0 never splits.
+
+    Returns:
+        list: The attachments, each with "content" and "filename" keys.
+    """
+    extension = EXPORTERS[fmt].extension
+    if max_rows is None:
+        max_rows = Config.REPORT_MAX_FILE_ROWS
+    if not max_rows:
+        return [build_attachment(fmt, entity, records, f"{name}{extension}", summary)]
+
+    records = iter(records)
+    parts = []
+    first_record = next(records, None)
+    while True:
+        part = [] if first_record is None else chain([first_record], records)
+        upcoming = []
+
+        def part_summary():
+            # Peek past the part: only the last one carries the summary
+            upcoming.append(next(records, None))
+            if upcoming[0] is None and summary is not None:
+                return summary()
+            return None
+
+        parts.append(
+            build_attachment(
+                fmt, entity, islice(part, max_rows), f"{name}{extension}", part_summary
+            )
+        )
+        first_record = upcoming[0] if upcoming else None
+        if first_record is None:
+            break
+
+    if len(parts) > 1:
+        for number, part in enumerate(parts, start=1):
+            part["filename"] = f"{name}_{number}{extension}"
+    return parts
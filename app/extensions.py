@@ -0,0 +1,5 @@
+from flask_sqlalchemy import SQLAlchemy
+
+# Kept out of app/__init__.py so importing the package (e.g. for celery beat)
+# does not load Flask-SQLAlchemy
+db = SQLAlchemy()
@@ -0,0 +1,519 @@
+import os
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from itertools import islice
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.exceptions import (
+    ChunkedEncodingError,
+    ConnectionError,
+    RequestException,
+    Timeout,
+)
+
+from app import jsonutil, metrics
+from app.circuit_breaker import CircuitBreaker, CircuitOpenError
+from app.paging import PageSizer
+from app.records import compact_records, record_type
+from config import Config
+
+_session = None
+_session_pid = None
+_session_lock = threading.Lock()
+
+
+def get_session():
+    """
+    Return the process-wide pooled session used for every Foodbasket API call.
+
+    The session keeps connections alive between pages and runs, caps the number
+    of pooled connections per host and negotiates gzip responses. It is created
+    lazily and rebuilt after a fork so Celery prefork children never share
+    sockets with their parent.
+
+    Returns:
+        requests.Session: The shared session.
+    """
+    global _session, _session_pid
+
+    pid = os.getpid()
+    if _session is not None and _session_pid == pid:
+        return _session
+
+    with _session_lock:
+        if _session is None or _session_pid != pid:
+            session = requests.Session()
+            adapter = HTTPAdapter(
+                pool_connections=Config.FOODBASKET_POOL_CONNECTIONS,
+                pool_maxsize=Config.FOODBASKET_POOL_MAXSIZE,
+            )
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            session.headers.update(
+                {"Accept": "application/json", "Accept-Encoding": "gzip, deflate"}
+            )
+            _session = session
+            _session_pid = pid
+
+    return _session
+
+
+# Responses worth retrying: rate limiting and transient upstream failures
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+
+def _breaker_for(url):
+    host = urlsplit(url).netloc
+    with _breakers_lock:
+        breaker = _breakers.get(host)
+        if breaker is None:
+            breaker = CircuitBreaker(
+                host,
+                Config.FOODBASKET_BREAKER_THRESHOLD,
+                Config.FOODBASKET_BREAKER_RESET_TIMEOUT,
+            )
+            _breakers[host] = breaker
+        return breaker
+
+
+def _retry_after(response):
+    """Seconds requested by a Retry-After header, or None."""
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    if value.isdigit():
+        return float(value)
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max((retry_at - datetime.now(timezone.utc)).total_seconds(), 0)
+
+
+def _backoff(attempt):
+    """Exponential backoff with full jitter."""
+    return random.uniform(0, Config.FOODBASKET_RETRY_BACKOFF * 2**attempt)
+
+
+def get(url, retry_timeouts=True, **kwargs):
+    """
+    Issue a GET request against the Foodbasket API through the pooled session.
+
+    Connection errors, timeouts and 429/5xx responses are retried up to
+    FOODBASKET_MAX_RETRIES times with exponential backoff and jitter, honoring
+    Retry-After. A per-host circuit breaker holds requests back once the
+    upstream keeps failing: they wait for it to close again, for at most
+    FOODBASKET_MAX_RETRIES reset periods, instead of piling onto the host or
+    failing the whole fetch over a short outage.
+
+    Args:
+        url (str): The full endpoint URL.
+        retry_timeouts (bool, optional): Retry read timeouts. Callers that
+            react to a timeout themselves (e.g., by shrinking the page) pass False.
+        **kwargs: Extra arguments passed on to requests.
+
+    Returns:
+        requests.Response: The raw response; a retryable status is returned
+            once the retries are exhausted.
+
+    Raises:
+        CircuitOpenError: If the host's circuit breaker stays open too long.
+        RequestException: If the request still fails after the retries.
+    """
+    kwargs.setdefault(
+        "timeout",
+        (Config.FOODBASKET_CONNECT_TIMEOUT, Config.FOODBASKET_READ_TIMEOUT),
+    )
+    breaker = _breaker_for(url)
+    endpoint = "count" if urlsplit(url).path.endswith("/count") else "page"
+
+    attempt = 0
+    circuit_deadline = None
+    while True:
+        wait = breaker.before_request()
+        if wait:
+            now = time.monotonic()
+            if circuit_deadline is None:
+                circuit_deadline = now + breaker.reset_timeout * max(
+                    Config.FOODBASKET_MAX_RETRIES, 1
+                )
+            if now + wait > circuit_deadline:
+                raise CircuitOpenError(
+                    f"Circuit open for {breaker.host}; retry in {wait:.0f} seconds."
+                )
+            time.sleep(wait)
+            continue
+
+        try:
+            with metrics.timed(metrics.FOODBASKET_REQUEST_SECONDS, endpoint=endpoint):
+                response = get_session().get(url, **kwargs)
+        except (ConnectionError, Timeout, ChunkedEncodingError) as e:
+            if isinstance(e, Timeout) and not retry_timeouts:
+                # Not the host's fault as far as we know; let the caller adapt
+                breaker.record_success()
+                raise
+            breaker.record_failure()
+            if attempt >= Config.FOODBASKET_MAX_RETRIES:
+                raise
+            reason = "timeout" if isinstance(e, Timeout) else "connection"
+            delay = _backoff(attempt)
+        except RequestException:
+            # Not worth retrying, but it must still settle a half-open trial
+            breaker.record_failure()
+            raise
+        else:
+            metrics.FOODBASKET_RESPONSE_BYTES.labels(endpoint=endpoint).inc(
+                len(response.content)
+            )
+            if response.status_code not in RETRY_STATUSES:
+                breaker.record_success()
+                return response
+            if response.status_code >= 500:
+                breaker.record_failure()
+            else:
+                breaker.record_success()
+            if attempt >= Config.FOODBASKET_MAX_RETRIES:
+                return response
+            reason = str(response.status_code)
+            delay = _retry_after(response)
+            if delay is None:
+                delay = _backoff(attempt)
+            response.close()
+
+        metrics.FOODBASKET_RETRIES.labels(reason=reason).inc()
+        attempt += 1
+        time.sleep(min(delay, Config.FOODBASKET_RETRY_MAX_DELAY))
+
+
+class FoodbasketError(Exception):
+    """
+    Raised by the streaming fetcher when the Foodbasket API cannot be read.
+
+    Attributes:
+        error (dict): The JSON error details, in the same shape that
+            fetch_data_in_batches returns.
+    """
+
+    def __init__(self, error):
+        super().__init__(error["error"])
+        self.error = error
+
+
+def _build_filter_query(filters):
+    if not filters:
+        return ""
+    return "&".join(f"{key}={value}" for key, value in filters.items())
+
+
+def count_records(entity, filters=None):
+    """
+    Get the number of records matching the filters.
+
+    Args:
+        entity (str): The type of data to count ("orders" or "invoices").
+        filters (dict, optional): Additional filters (e.g., {"date": "2025-01-15"}).
+
+    Returns:
+        int: The total number of records.
+
+    Raises:
+        FoodbasketError: If the count cannot be fetched.
+    """
+    count_endpoint = f"{Config.FOODBASKET_API_URL}/foodbasket/{entity}/count"
+    filter_query = _build_filter_query(filters)
+    # Add filters to the count endpoint
+    if filter_query:
+        count_endpoint += f"?{filter_query}"
+
+    try:
+        count_response = get(count_endpoint)
+        count_response.raise_for_status()  # Raise an HTTPError for bad responses (4xx and 5xx)
+    except ConnectionError:
+        raise FoodbasketError(
+            {
+                "error": f"Failed to connect to the server while fetching {entity} count",
+                "details": "The server might be unavailable or the connection was refused.",
+            }
+        )
+    except Timeout:
+        raise FoodbasketError(
+            {
+                "error": f"Request timed out while fetching {entity} count",
+                "details": "The server did not respond in time. Please try again later.",
+            }
+        )
+    except RequestException as e:
+        raise FoodbasketError(
+            {
+                "error": f"An error occurred while fetching {entity} count",
+                "details": str(e),
+            }
+        )
+
+    # Check for missing 'data' in the count response
+    with metrics.timed(metrics.FOODBASKET_JSON_DECODE_SECONDS, endpoint="count"):
+        count_data = jsonutil.loads(count_response.content)
+    if "data" not in count_data:
+        raise FoodbasketError(
+            {
+                "error": f"Response for {entity} count is missing 'data'",
+                "response": count_data,
+            }
+        )
+    return count_data.get("data", 0)
+
+
+def iter_data_in_batches(
+    entity,
+    batch_size=None,
+    fields=None,
+    filters=None,
+    concurrency=None,
+    start_offset=0,
+    total_records=None,
+):
+    """
+    Stream data from the Foodbasket API one page at a time.
+
+    At most `concurrency` pages are in flight or buffered at once and pages are
+    yielded in offset order, so memory stays bounded by the window rather than
+    by the day's record count. Without an explicit batch_size the page size is
+    adaptive: it starts from the best size remembered for the entity, pages
+    rejected with a 413 or a timeout are split in half and retried, and the
+    observed latency and payload size pick the starting size for the next run.
+
+    Args:
+        entity (str): The type of data to fetch ("orders" or "invoices").
+        batch_size (int, optional): Fixed number of records to fetch per batch.
+            Defaults to the adaptive page size.
+        fields (str, optional): Comma-separated fields to fetch.
+        filters (dict, optional): Additional filters (e.g., {"date": "2025-01-15"}).
+        concurrency (int, optional): Maximum number of pages in flight.
+            Defaults to Config.FOODBASKET_FETCH_CONCURRENCY; 1 fetches sequentially.
+        start_offset (int, optional): Offset of the first record to fetch.
+        total_records (int, optional): A count already fetched by the caller,
+            which skips the count request.
+
+    Yields:
+        list: The records of each page, in offset order.
+
+    Raises:
+        FoodbasketError: If the count or any page cannot be fetched.
+    """
+    if concurrency is None:
+        concurrency = Config.FOODBASKET_FETCH_CONCURRENCY
+
+    sizer = None
+    if batch_size is None:
+        sizer = PageSizer(entity)
+        batch_size = sizer.size
+
+    base_url = f"{Config.FOODBASKET_API_URL}/foodbasket/{entity}"
+    filter_query = _build_filter_query(filters)
+
+    if total_records is None:
+        total_records = count_records(entity, filters)
+
+    def fetch_split(offset, size):
+        """Retry a rejected page as smaller pages covering the same range."""
+        smaller = sizer.shrink(size)
+        end = offset + size
+        records = []
+        for start in range(offset, end, smaller):
+            records.extend(fetch_batch(start, min(smaller, end - start)))
+        return records
+
+    def fetch_batch(offset, size):
+        """Fetch the records of a single page."""
+        data_endpoint = f"{base_url}?maxAllowed={size}&offset={offset}"
+        if fields:
+            data_endpoint += f"&{filter_query}&fields={fields}"
+        else:
+            data_endpoint += f"&{filter_query}"
+
+        can_split = sizer is not None and size > sizer.min_size
+        started = time.monotonic()
+        try:
+            # A timed out page that can be split is retried as smaller pages
+            response = get(data_endpoint, retry_timeouts=not can_split)
+            response.raise_for_status()
+        except ConnectionError:
+            raise FoodbasketError(
+                {
+                    "error": f"Failed to connect to the server while fetching {entity} data",
+                    "details": "The server might be unavailable or the connection was refused.",
+                }
+            )
+        except Timeout:
+            if can_split:
+                return fetch_split(offset, size)
+            raise FoodbasketError(
+                {
+                    "error": f"Request timed out while fetching {entity} data",
+                    "details": "The server did not respond in time. Please try again later.",
+                }
+            )
+        except RequestException as e:
+            too_large = e.response is not None and e.response.status_code == 413
+            if too_large and can_split:
+                return fetch_split(offset, size)
+            raise FoodbasketError(
+                {
+                    "error": f"An error occurred while fetching {entity} data",
+                    "details": str(e),
+                }
+            )
+        elapsed = time.monotonic() - started
+
+        # Check for missing 'data' in the data response
+        with metrics.timed(metrics.FOODBASKET_JSON_DECODE_SECONDS, endpoint="page"):
+            response_json = jsonutil.loads(response.content)
+        if "data" not in response_json:
+            raise FoodbasketError(
+                {
+                    "error": f"Response for {entity} data is missing 'data'",
+                    "response": response_json,
+                }
+            )
+        data_batch = response_json["data"].get(entity.capitalize(), [])
+        if Config.FOODBASKET_COMPACT_RECORDS:
+            data_batch = compact_records(data_batch)
+        metrics.FOODBASKET_PAGES.labels(entity=entity).inc()
+        metrics.FOODBASKET_RECORDS.labels(entity=entity).inc(len(data_batch))
+
+        if sizer is not None:
+            sizer.observe(len(data_batch), elapsed, len(response.content), size)
+            expected = min(size, total_records - offset)
+            if 0 < len(data_batch) < expected:
+                # The upstream capped maxAllowed; fetch the rest at its limit
+                sizer.cap(len(data_batch))
+                data_batch.extend(
+                    fetch_batch(offset + len(data_batch), expected - len(data_batch))
+                )
+        return data_batch
+
+    def pages():
+        # Offsets follow the current page size as pages are submitted, so a
+        # size lowered by an earlier page applies to the rest of the run
+        offset = start_offset
+        while offset < total_records:
+            size = sizer.size if sizer is not None else batch_size
+            yield offset, size
+            offset += size
+
+    # Pages only get smaller during a run, so there are at least this many
+    page_count = -(-(total_records - start_offset) // batch_size)
+
+    if concurrency <= 1 or page_count <= 1:
+        for offset, size in pages():
+            yield fetch_batch(offset, size)
+    else:
+        executor = ThreadPoolExecutor(max_workers=min(concurrency, page_count))
+        try:
+            pending = deque()
+            remaining = pages()
+            for offset, size in islice(remaining, concurrency):
+                pending.append(executor.submit(fetch_batch, offset, size))
+            # Yield in submission order so records keep their offset order,
+            # topping the window back up as each page is handed out
+            while pending:
+                data_batch = pending.popleft().result()
+                for offset, size in islice(remaining, 1):
+                    pending.append(executor.submit(fetch_batch, offset, size))
+                yield data_batch
+        finally:
+            # Drop pages that have not started yet once a page has failed
+            # or the consumer has stopped early
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    if sizer is not None:
+        sizer.save()
+
+
+def fetch_data_in_batches(
+    entity, batch_size=None, fields=None, filters=None, concurrency=None
+):
+    """
+    Fetch data in batches from the Foodbasket API.
+
+    Collects every page from iter_data_in_batches into a single list, which
+    matches a sequential fetch record for record.
+
+    Args:
+        entity (str): The type of data to fetch ("orders" or "invoices").
+        batch_size (int, optional): Fixed number of records to fetch per batch.
+            Defaults to the adaptive page size.
+        fields (str, optional): Comma-separated fields to fetch.
+        filters (dict, optional): Additional filters (e.g., {"date": "2025-01-15"}).
+        concurrency (int, optional): Maximum number of pages in flight.
+
+    Returns:
+        list: A list of all fetched data.
+        dict: A JSON object with error details if something goes wrong.
+    """
+    all_data = []
+    try:
+        for data_batch in iter_data_in_batches(
+            entity, batch_size, fields, filters, concurrency
+        ):
+            all_data.extend(data_batch)
+    except FoodbasketError as e:
+        return e.error
+    return all_data
+
+
+def _payment_method_total(record, method):
+    try:
+        return float(record.get(f"U_total_{method}") or 0)
+    except (TypeError, ValueError):
+        return 0
+
+
+def union_fields(field_lists):
+    """
+    Merge comma-separated field lists, keeping the first-seen order.
+
+    Args:
+        field_lists (iterable): Comma-separated field strings.
+
+    Returns:
+        str: The comma-separated union of the fields.
+    """
+    return ",".join(
+        dict.fromkeys(field for fields in field_lists for field in fields.split(","))
+    )
+
+
+def filter_payment_method(records, method, fields):
+    """
+    Pick the records paid with one payment method out of a combined fetch.
+
+    Args:
+        records (iterable): Records fetched for several payment methods.
+        method (str): The payment method to keep (e.g., "bis").
+        fields (str): Comma-separated fields to keep for the method.
+
+    Yields:
+        dict | Record: The method's records, limited to its own fields.
+    """
+    field_list = fields.split(",")
+    if Config.FOODBASKET_COMPACT_RECORDS:
+        cls = record_type(tuple(field_list))
+        for record in records:
+            if _payment_method_total(record, method):
+                yield cls(tuple(record.get(field) for field in field_list))
+        return
+    for record in records:
+        if _payment_method_total(record, method):
+            yield {field: record.get(field) for field in field_list}
+
@@ -0,0 +1,93 @@
+import json
+from collections.abc import Mapping
+
+from flask.json.provider import DefaultJSONProvider
+
+from config import Config
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is optional
+    orjson = None
+
+USE_ORJSON = orjson is not None and Config.JSON_BACKEND == "orjson"
+
+if orjson is not None:
+    # Dates and dataclasses go through `default` so the output matches Flask's
+    ORJSON_OPTIONS = (
+        orjson.OPT_NON_STR_KEYS
+        | orjson.OPT_PASSTHROUGH_DATETIME
+        | orjson.OPT_PASSTHROUGH_DATACLASS
+    )
+
+
+def _default(obj):
+    # Compact records (app.records.Record) are mappings, not dicts
+    if isinstance(obj, Mapping):
+        return dict(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def loads(data):
+    """
+    Decode JSON with the configured backend.
+
+    Args:
+        data (bytes | str): The JSON document, e.g. a raw response body.
+
+    Returns:
+        object: The decoded value.
+    """
+    if USE_ORJSON:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def dumps(obj):
+    """
+    Encode a value as compact JSON with the configured backend.
+
+    Args:
+        obj (object): The value; compact records are encoded as objects.
+
+    Returns:
+        str: The JSON document.
+    """
+    if USE_ORJSON:
+        return orjson.dumps(
+            obj, default=_default, option=orjson.OPT_NON_STR_KEYS
+        ).decode()
+    return json.dumps(obj, default=_default, separators=(",", ":"))
+
+
+class JSONProvider(DefaultJSONProvider):
+    """
+    Flask JSON provider that encodes responses with orjson when enabled.
+
+    Output matches the default provider: keys are sorted, and dates, decimals
+    and dataclasses are converted by its `default` hook. Compact records are
+    encoded as objects.
+    """
+
+    @staticmethod
+    def default(obj):
+        if isinstance(obj, Mapping):
+            return dict(obj)
+        return DefaultJSONProvider.default(obj)
+
+    def dumps(self, obj, **kwargs):
+        # jsonify passes the compact separators orjson always uses; anything
+        # else (indent, for pretty-printed debug responses) keeps the stdlib
+        # encoder
+        compact = kwargs.get("separators", (",", ":")) == (",", ":")
+        if not USE_ORJSON or not compact or kwargs.keys() - {"separators"}:
+            return super().dumps(obj, **kwargs)
+        option = ORJSON_OPTIONS
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        return orjson.dumps(obj, default=self.default, option=option).decode()
+
+    def loads(self, s, **kwargs):
+        if not USE_ORJSON or kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
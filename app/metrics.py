@@ -0,0 +1,87 @@
+import os
+import time
+from contextlib import contextmanager
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+# Foodbasket API
+FOODBASKET_REQUEST_SECONDS = Histogram(
+    "foodbasket_request_seconds",
+    "Latency of Foodbasket API requests, per attempt.",
+    ["endpoint"],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10, 30, 60),
+)
+FOODBASKET_RESPONSE_BYTES = Counter(
+    "foodbasket_response_bytes_total",
+    "Bytes received from the Foodbasket API.",
+    ["endpoint"],
+)
+FOODBASKET_JSON_DECODE_SECONDS = Histogram(
+    "foodbasket_json_decode_seconds",
+    "Time spent decoding Foodbasket API responses.",
+    ["endpoint"],
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1),
+)
+FOODBASKET_PAGES = Counter(
+    "foodbasket_pages_total", "Pages fetched from the Foodbasket API.", ["entity"]
+)
+FOODBASKET_RECORDS = Counter(
+    "foodbasket_records_total", "Records fetched from the Foodbasket API.", ["entity"]
+)
+FOODBASKET_RETRIES = Counter(
+    "foodbasket_retries_total", "Retried Foodbasket API requests.", ["reason"]
+)
+
+# Reports and email
+REPORT_BUILD_SECONDS = Histogram(
+    "report_build_seconds",
+    "Time spent building and saving report workbooks.",
+    ["stage"],
+    buckets=(0.1, 0.25, 0.5, 1, 2, 5, 10, 30, 60, 120),
+)
+REPORT_ROWS = Counter("report_rows_total", "Rows written to report workbooks.")
+REPORT_BYTES = Counter("report_bytes_total", "Bytes of rendered report workbooks.")
+RESEND_SEND_SECONDS = Histogram(
+    "resend_send_seconds",
+    "Latency of Resend email API calls.",
+    buckets=(0.1, 0.25, 0.5, 1, 2, 5, 10, 30),
+)
+RESEND_MESSAGES = Counter(
+    "resend_messages_total", "Email messages sent through Resend.", ["status"]
+)
+
+
+@contextmanager
+def timed(histogram, **labels):
+    """Observe the duration of the block on a histogram."""
+    metric = histogram.labels(**labels) if labels else histogram
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        metric.observe(time.perf_counter() - started)
+
+
+def render_metrics():
+    """
+    Render all metrics in the Prometheus text format.
+
+    With PROMETHEUS_MULTIPROC_DIR set (shared by the web and Celery workers)
+    the metrics of every process are aggregated; otherwise only this process
+    is reported.
+
+    Returns:
+        tuple: The response body and its content type.
+    """
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(), CONTENT_TYPE_LATEST
@@ -1,4 +1,4 @@
-from app import db
+from app.extensions import db
 
 
 class EmailRecipient(db.Model):
@@ -6,6 +6,41 @@ class EmailRecipient(db.Model):
     email = db.Column(db.String(120), unique=True, nullable=False)
     name = db.Column(db.String(120), nullable=True)
     active = db.Column(db.Boolean, default=True)
+    # Export format of the daily report attachments; None uses REPORT_FORMAT
+    report_format = db.Column(db.String(10), nullable=True)
 
     def __repr__(self):
         return super().__repr__() + f" {self.name}"
+
+
+class SalesRecordMixin:
+    """Columns shared by the locally stored order and invoice sales records."""
+
+    # A split payment shows up once per payment method, so both form the key
+    doc_entry = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    payment_method = db.Column(db.String(20), primary_key=True, index=True)
+    doc_num = db.Column(db.Integer, nullable=True)
+    doc_date = db.Column(db.Date, nullable=False, index=True)
+    doc_time = db.Column(db.String(20), nullable=True)
+    creation_date = db.Column(db.Date, nullable=True)
+    card_code = db.Column(db.String(50), nullable=True, index=True)
+    doc_total = db.Column(db.Numeric(19, 6), nullable=True)
+    total_bis = db.Column(db.Numeric(19, 6), nullable=True)
+    total_voucher = db.Column(db.Numeric(19, 6), nullable=True)
+    total_cash = db.Column(db.Numeric(19, 6), nullable=True)
+    total_debit = db.Column(db.Numeric(19, 6), nullable=True)
+    num_at_card = db.Column(db.String(100), nullable=True)
+    voucher_id = db.Column(db.String(100), nullable=True)
+    receipt_id = db.Column(db.String(100), nullable=True)
+    synced_at = db.Column(db.DateTime, nullable=False)
+
+    def __repr__(self):
+        return super().__repr__() + f" {self.doc_entry} {self.payment_method}"
+
+
+class OrderSalesRecord(SalesRecordMixin, db.Model):
+    pass
+
+
+class InvoiceSalesRecord(SalesRecordMixin, db.Model):
+    pass
@@ -0,0 +1,129 @@
+import threading
+
+from redis.exceptions import RedisError
+
+from app.redis_client import get_redis
+from config import Config
+
+# Process-local fallback when Redis is not reachable
+_local_sizes = {}
+_local_lock = threading.Lock()
+
+
+def _key(entity):
+    return f"foodbasket:page-size:{entity}"
+
+
+class PageSizer:
+    """
+    Adaptive page size for one Foodbasket entity.
+
+    A run starts from the best size remembered for the entity (or the configured
+    maximum), shrinks immediately when the upstream rejects a page as too large
+    or times out, and at the end of the run picks the size for the next one from
+    the observed latency and payload size of its pages.
+    """
+
+    def __init__(self, entity):
+        self.entity = entity
+        self.min_size = Config.FOODBASKET_MIN_PAGE_SIZE
+        self.max_size = Config.FOODBASKET_MAX_PAGE_SIZE
+        self.size = self._load()
+        self._lock = threading.Lock()
+        self._records = 0
+        self._bytes = 0
+        self._full_pages = 0
+        self._full_records = 0
+        self._elapsed = 0.0
+        self._failures = 0
+
+    def _load(self):
+        client = get_redis()
+        if client is not None:
+            try:
+                stored = client.get(_key(self.entity))
+                if stored is not None:
+                    return self._clamp(int(stored))
+            except (RedisError, ValueError):
+                pass
+        with _local_lock:
+            return self._clamp(_local_sizes.get(self.entity, self.max_size))
+
+    def _clamp(self, size):
+        return max(self.min_size, min(self.max_size, size))
+
+    def observe(self, records, elapsed, nbytes, requested):
+        """
+        Record a successful page.
+
+        Args:
+            records (int): Number of records in the page.
+            elapsed (float): Seconds spent on the request.
+            nbytes (int): Size of the response body.
+            requested (int): The page size asked for. Short pages, such as the
+                last one of a run, say little about how latency grows with the
+                page size and are left out of the latency estimate.
+        """
+        with self._lock:
+            self._records += records
+            self._bytes += nbytes
+            if records >= requested:
+                self._full_pages += 1
+                self._full_records += records
+                self._elapsed += elapsed
+
+    def shrink(self, size):
+        """
+        Record a page that was too large (413 or timeout) and halve the size.
+
+        Args:
+            size (int): The page size that failed.
+
+        Returns:
+            int: The page size to retry with.
+        """
+        with self._lock:
+            self._failures += 1
+            self.size = self._clamp(min(self.size, size // 2))
+            return self.size
+
+    def cap(self, size):
+        """Lower the size to a limit the upstream enforced silently."""
+        with self._lock:
+            self.size = self._clamp(min(self.size, size))
+
+    def save(self):
+        """
+        Choose the starting size for the next run and remember it.
+
+        Returns:
+            int: The remembered page size.
+        """
+        with self._lock:
+            size = self.size
+            # Runs without a full page (a small day) keep the current size
+            if self._full_pages and not self._failures:
+                latency = self._elapsed / self._full_pages
+                page_records = self._full_records / self._full_pages
+                record_bytes = self._bytes / self._records
+                # Largest page that keeps both latency and payload within budget
+                by_latency = (
+                    page_records
+                    * Config.FOODBASKET_TARGET_PAGE_SECONDS
+                    / max(latency, 1e-3)
+                )
+                by_bytes = Config.FOODBASKET_MAX_PAGE_BYTES / max(record_bytes, 1)
+                target = min(by_latency, by_bytes)
+                # Grow at most 2x per run so a single fast run cannot overshoot
+                size = int(min(target, size * 2))
+            size = self._clamp(size)
+
+        with _local_lock:
+            _local_sizes[self.entity] = size
+        client = get_redis()
+        if client is not None:
+            try:
+                client.set(_key(self.entity), size)
+            except RedisError:
+                pass
+        return size
@@ -0,0 +1,98 @@
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from itertools import islice
+
+from app.cache import cached_pages
+from config import Config
+
+CHUNK_DAYS = {"day": 1, "week": 7}
+
+
+def split_date_range(start_date, end_date, chunk="day"):
+    """
+    Split an inclusive date range into consecutive chunks.
+
+    Args:
+        start_date (date): First day of the range.
+        end_date (date): Last day of the range.
+        chunk (str): "day" or "week".
+
+    Returns:
+        list: (start, end) date string pairs in chronological order.
+    """
+    step = timedelta(days=CHUNK_DAYS[chunk])
+    chunks = []
+    chunk_start = start_date
+    while chunk_start <= end_date:
+        chunk_end = min(chunk_start + step - timedelta(days=1), end_date)
+        chunks.append((chunk_start.isoformat(), chunk_end.isoformat()))
+        chunk_start = chunk_end + timedelta(days=1)
+    return chunks
+
+
+def iter_date_range(
+    entity, fields, filters, start_date, end_date, chunk="day", concurrency=None
+):
+    """
+    Stream the records for a date range, fetching its chunks in parallel.
+
+    Each chunk is an ordinary paged fetch with startDate/endDate narrowed to the
+    chunk, so closed days are served from the cache after their first fetch.
+    Up to `concurrency` chunks run at once and their records are yielded in
+    date order. The chunks share the connection pool: each one fetches at most
+    FOODBASKET_POOL_MAXSIZE / chunks-in-flight pages at once, so the fan-out
+    never needs more connections than the pool keeps.
+
+    Args:
+        entity (str): The type of data to fetch ("orders" or "invoices").
+        fields (str): Comma-separated fields to fetch.
+        filters (dict): Filters shared by every chunk (e.g., paymentMethods).
+        start_date (date): First day of the range.
+        end_date (date): Last day of the range.
+        chunk (str): "day" or "week".
+        concurrency (int, optional): Maximum number of chunks in flight.
+            Defaults to Config.FOODBASKET_RANGE_CONCURRENCY.
+
+    Yields:
+        list: The records of each chunk, in date order.
+
+    Raises:
+        FoodbasketError: If any chunk cannot be fetched.
+    """
+    if concurrency is None:
+        concurrency = Config.FOODBASKET_RANGE_CONCURRENCY
+
+    chunks = split_date_range(start_date, end_date, chunk)
+    workers = max(1, min(concurrency, len(chunks)))
+    page_concurrency = max(
+        1,
+        min(
+            Config.FOODBASKET_FETCH_CONCURRENCY,
+            Config.FOODBASKET_POOL_MAXSIZE // workers,
+        ),
+    )
+
+    def fetch_chunk(dates):
+        chunk_filters = {**filters, "startDate": dates[0], "endDate": dates[1]}
+        records = []
+        for data_batch in cached_pages(
+            entity, fields, chunk_filters, concurrency=page_concurrency
+        ):
+            records.extend(data_batch)
+        return records
+
+    executor = ThreadPoolExecutor(max_workers=workers)
+    try:
+        pending = deque()
+        remaining = iter(chunks)
+        for dates in islice(remaining, concurrency):
+            pending.append(executor.submit(fetch_chunk, dates))
+        # Yield in date order, topping the window back up as chunks complete
+        while pending:
+            records = pending.popleft().result()
+            for dates in islice(remaining, 1):
+                pending.append(executor.submit(fetch_chunk, dates))
+            yield records
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
@@ -0,0 +1,187 @@
+import threading
+
+from redis.exceptions import RedisError
+
+from app import jsonutil
+from app.extensions import db
+from app.models import EmailRecipient
+from app.redis_client import get_redis
+from config import Config
+
+VERSION_KEY = "email-recipients:version"
+LIST_KEY_PREFIX = "email-recipients:active"
+
+# The last list this process read, with the version it was read at
+_cached = None
+_cached_lock = threading.Lock()
+
+
+def serialize(recipient):
+    return {
+        "id": recipient.id,
+        "email": recipient.email,
+        "name": recipient.name,
+        "active": recipient.active,
+        "report_format": recipient.report_format,
+    }
+
+
+def bump_version():
+    """
+    Mark the cached active-recipient lists as stale.
+
+    Call after committing any recipient write. Every process compares its
+    cached list against the shared version, so the next read reloads it.
+    """
+    global _cached
+
+    with _cached_lock:
+        _cached = None
+    client = get_redis()
+    if client is None:
+        return
+    try:
+        client.incr(VERSION_KEY)
+    except RedisError:
+        pass
+
+
+def _load_active():
+    return [
+        [email, report_format]
+        for email, report_format in db.session.execute(
+            db.select(EmailRecipient.email, EmailRecipient.report_format)
+            .filter_by(active=True)
+            .order_by(EmailRecipient.id)
+        )
+    ]
+
+
+def _active():
+    """
+    Return [email, report_format] pairs of the active recipients.
+
+    The list is cached per recipient version: in this process, and in Redis for
+    the other workers, so a send reads it without querying the database until
+    a recipient write bumps the version. Without Redis the version cannot be
+    shared and the database is queried every time.
+    """
+    global _cached
+
+    client = get_redis()
+    if client is None:
+        return _load_active()
+
+    try:
+        version = int(client.get(VERSION_KEY) or 0)
+    except (RedisError, ValueError):
+        return _load_active()
+
+    cached = _cached
+    if cached is not None and cached[0] == version:
+        return cached[1]
+
+    list_key = f"{LIST_KEY_PREFIX}:{version}"
+    try:
+        raw = client.get(list_key)
+    except RedisError:
+        raw = None
+    if raw is not None:
+        active = jsonutil.loads(raw)
+    else:
+        active = _load_active()
+        try:
+            client.set(
+                list_key, jsonutil.dumps(active), ex=Config.RECIPIENTS_CACHE_TTL
+            )
+        except RedisError:
+            pass
+
+    with _cached_lock:
+        _cached = (version, active)
+    return active
+
+
+def active_recipients_by_format():
+    """
+    Group the active recipients by the report format they receive.
+
+    Returns:
+        dict: Email addresses keyed by export format; recipients without a
+            format of their own are listed under REPORT_FORMAT.
+    """
+    by_format = {}
+    for email, report_format in _active():
+        by_format.setdefault(report_format or Config.REPORT_FORMAT, []).append(email)
+    return by_format
+
+
+def upsert_recipients(rows):
+    """
+    Insert or update recipients by email in the current transaction.
+
+    Existing emails are found with a single IN query; the caller commits.
+
+    Args:
+        rows (list): Dicts with "email" and optional "name", "active" and
+            "report_format".
+
+    Returns:
+        tuple: The created and the updated EmailRecipient instances.
+    """
+    emails = [row["email"] for row in rows]
+    existing = {
+        recipient.email: recipient
+        for recipient in db.session.execute(
+            db.select(EmailRecipient).where(EmailRecipient.email.in_(emails))
+        ).scalars()
+    }
+
+    created, updated = [], []
+    for row in rows:
+        recipient = existing.get(row["email"])
+        if recipient is None:
+            recipient = EmailRecipient(
+                email=row["email"],
+                name=row.get("name"),
+                active=row.get("active", True),
+                report_format=row.get("report_format"),
+            )
+            db.session.add(recipient)
+            created.append(recipient)
+        else:
+            recipient.name = row.get("name", recipient.name)
+            recipient.active = row.get("active", recipient.active)
+            recipient.report_format = row.get(
+                "report_format", recipient.report_format
+            )
+            updated.append(recipient)
+    return created, updated
+
+
+def set_active(active, ids=None, emails=None):
+    """
+    Activate or deactivate recipients with a single UPDATE; the caller commits.
+
+    Args:
+        active (bool): The new state.
+        ids (list, optional): Recipient ids to update.
+        emails (list, optional): Recipient emails to update.
+
+    Returns:
+        int: Number of recipients matched.
+    """
+    conditions = []
+    if ids:
+        conditions.append(EmailRecipient.id.in_(ids))
+    if emails:
+        conditions.append(EmailRecipient.email.in_(emails))
+    if not conditions:
+        return 0
+    result = db.session.execute(
+        db.update(EmailRecipient)
+        .where(db.or_(*conditions))
+        .values(active=active)
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount
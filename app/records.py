@@ -0,0 +1,92 @@
+from collections.abc import Mapping
+from functools import lru_cache
+
+
+class Record(Mapping):
+    """
+    A read-only record that stores only its values.
+
+    Every record with the same keys shares one subclass (see record_type) that
+    holds the field names and their positions, so a record costs one small
+    object and a tuple instead of a dict with its own hash table. Records
+    behave like read-only dicts: get, keys, items, `in` and len all work.
+    """
+
+    __slots__ = ("_values",)
+
+    _fields = ()
+    _index = {}
+
+    def __init__(self, values):
+        self._values = values
+
+    def __getitem__(self, key):
+        return self._values[self._index[key]]
+
+    def get(self, key, default=None):
+        index = self._index.get(key)
+        return default if index is None else self._values[index]
+
+    def __contains__(self, key):
+        return key in self._index
+
+    def __iter__(self):
+        return iter(self._fields)
+
+    def __len__(self):
+        return len(self._fields)
+
+    def __repr__(self):
+        return f"Record({dict(zip(self._fields, self._values))!r})"
+
+    def __reduce__(self):
+        return _rebuild, (self._fields, self._values)
+
+
+@lru_cache(maxsize=None)
+def record_type(fields):
+    """
+    Return the record class for a set of fields.
+
+    Args:
+        fields (tuple): The field names, in order.
+
+    Returns:
+        type: A Record subclass shared by every record with these fields.
+    """
+    return type(
+        "Record",
+        (Record,),
+        {
+            "__slots__": (),
+            "_fields": fields,
+            "_index": {field: i for i, field in enumerate(fields)},
+        },
+    )
+
+
+def _rebuild(fields, values):
+    return record_type(fields)(values)
+
+
+def compact_records(records):
+    """
+    Convert decoded records to compact records.
+
+    Records are normally all shaped by the same `fields` parameter, so they
+    share a single record type; a record with other keys gets its own.
+
+    Args:
+        records (list): Records as decoded from JSON.
+
+    Returns:
+        list: The same records as Record instances, in the same order.
+    """
+    compacted = []
+    cls = None
+    for record in records:
+        fields = tuple(record)
+        if cls is None or fields != cls._fields:
+            cls = record_type(fields)
+        compacted.append(cls(tuple(record.values())))
+    return compacted
@@ -0,0 +1,35 @@
+import threading
+
+import redis
+
+from config import Config
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_redis():
+    """
+    Return a shared Redis client for application state, or None when disabled.
+
+    The client points at Config.REDIS_URL, which defaults to the Celery broker
+    from docker-compose.yml. Callers must treat Redis as best effort and fall
+    back to process-local state when it is unavailable.
+
+    Returns:
+        redis.Redis | None: The client, or None if no Redis URL is configured.
+    """
+    global _client
+
+    if not Config.REDIS_URL:
+        return None
+
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = redis.Redis.from_url(
+                    Config.REDIS_URL,
+                    socket_connect_timeout=Config.REDIS_SOCKET_TIMEOUT,
+                    socket_timeout=Config.REDIS_SOCKET_TIMEOUT,
+                )
+    return _client
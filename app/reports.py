@@ -0,0 +1,146 @@
+import os
+from datetime import date
+from decimal import Decimal, InvalidOperation
+from itertools import chain
+
+from app import metrics
+from config import Config
+
+# Columns written as real Excel dates and fixed-point amounts instead of text
+DATE_COLUMNS = {"DocDate", "CreationDate"}
+DECIMAL_COLUMNS = {"DocTotal"}
+DECIMAL_COLUMN_PREFIX = "U_total_"
+
+DATE_FORMAT = "yyyy-mm-dd"
+DECIMAL_FORMAT = "#,##0.00"
+
+
+def _column_type(header):
+    if header in DATE_COLUMNS:
+        return "date"
+    if header in DECIMAL_COLUMNS or header.startswith(DECIMAL_COLUMN_PREFIX):
+        return "decimal"
+    return None
+
+
+def _to_date(value):
+    if isinstance(value, str) and len(value) >= 10:
+        try:
+            # Foodbasket dates come as "YYYY-MM-DD" or a full ISO timestamp
+            return date.fromisoformat(value[:10])
+        except ValueError:
+            pass
+    return value
+
+
+def _to_decimal(value):
+    if value is None or value == "":
+        return value
+    try:
+        return Decimal(str(value))
+    except InvalidOperation:
+        return value
+
+
+def _typed_cell(cell_class, sheet, column_type, value):
+    if column_type == "date":
+        cell = cell_class(sheet, value=_to_date(value))
+        cell.number_format = DATE_FORMAT
+        return cell
+    cell = cell_class(sheet, value=_to_decimal(value))
+    cell.number_format = DECIMAL_FORMAT
+    return cell
+
+
+def generate_excel_file(entity, records, target, summary=None, max_sheet_rows=None):
+    """
+    Generate an Excel file from the provided records.
+
+    The workbook is write-only: rows are serialized to disk as they are
+    appended, so memory use does not depend on how many records there are.
+    Date columns and DocTotal/U_total_* amounts are written as typed cells.
+    Records beyond the per-sheet row budget continue on further data sheets.
+
+    Args:
+        entity (str): The type of data ("orders" or "invoices").
+        records (iterable | dict): Records to write, consumed once, or the
+            error dict returned by fetch_data_in_batches.
+        target (str | file): The name of the file to save locally, or a binary
+            file object (such as io.BytesIO) to write the workbook into.
+        summary (callable, optional): Called once the records are written;
+            returns the rows of a "Summary" sheet added after the data sheets,
+            or None for no summary sheet.
+        max_sheet_rows (int, optional): Data rows per sheet. Defaults to
+            Config.REPORT_MAX_SHEET_ROWS.
+
+    Returns:
+        str | file: The path to the saved Excel file, or the file object.
+    """
+    # openpyxl is only needed once a workbook is written
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+
+    if max_sheet_rows is None:
+        max_sheet_rows = Config.REPORT_MAX_SHEET_ROWS
+
+    workbook = Workbook(write_only=True)
+    title = f"{entity.capitalize()} Data"
+    sheet = workbook.create_sheet(title=title)
+
+    if isinstance(records, dict):
+        sheet.append([records.get("details", records.get("error"))])
+    else:
+        records = iter(records)
+        first_record = next(records, None)
+        if not first_record:
+            sheet.append(["No data available"])
+        else:
+            # Extract headers from the keys of the first record
+            headers = list(first_record.keys())
+            column_types = [_column_type(header) for header in headers]
+            sheet.append(headers)
+
+            # Populate rows with data
+            rows = 0
+            with metrics.timed(metrics.REPORT_BUILD_SECONDS, stage="build"):
+                for record in chain([first_record], records):
+                    if rows and rows % max_sheet_rows == 0:
+                        sheet = workbook.create_sheet(
+                            title=f"{title} {rows // max_sheet_rows + 1}"
+                        )
+                        sheet.append(headers)
+                    sheet.append(
+                        [
+                            (
+                                _typed_cell(
+                                    WriteOnlyCell,
+                                    sheet,
+                                    column_type,
+                                    record.get(header, ""),
+                                )
+                                if column_type
+                                else record.get(header, "")
+                            )
+                            for header, column_type in zip(headers, column_types)
+                        ]
+                    )
+                    rows += 1
+            metrics.REPORT_ROWS.inc(rows)
+
+        summary_rows = summary() if summary is not None else None
+        if summary_rows is not None:
+            summary_sheet = workbook.create_sheet(title="Summary")
+            for row in summary_rows:
+                summary_sheet.append(row)
+
+    if not isinstance(target, str):
+        with metrics.timed(metrics.REPORT_BUILD_SECONDS, stage="save"):
+            workbook.save(target)
+        return target
+
+    # Save the workbook to a file
+    file_path = os.path.join(os.getcwd(), target)
+    with metrics.timed(metrics.REPORT_BUILD_SECONDS, stage="save"):
+        workbook.save(file_path)
+    return file_path
+
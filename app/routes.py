@@ -1,273 +1,274 @@
-from flask import jsonify, request, abort
+import io
+from flask import Response, jsonify, request, abort
+from itertools import chain
+from sqlalchemy.exc import IntegrityError
 from app.models import EmailRecipient
+from app import recipients as recipient_store
+from app.cache import invalidate as invalidate_cache
+from app.exporters import EXPORTERS, iter_csv
+from app.foodbasket import FoodbasketError
+from app.metrics import render_metrics
+from app.ranges import CHUNK_DAYS, iter_date_range
+from app.sales_store import query_sales_records
+from app.sync import synced_pages
 from config import Config
-import requests
-from datetime import datetime, timedelta
-from requests.exceptions import ConnectionError, Timeout, RequestException
-from openpyxl import Workbook
-import resend
-import os
-from app import db
-from celery import current_app as celery_app
-from celery.exceptions import MaxRetriesExceededError
-
-resend.api_key = Config.RESEND_API_KEY
+from datetime import date, datetime
+from app.extensions import db
+
+# Fields requested by the daily and range sales routes, per payment method
+SALES_FIELDS = {
+    "voucher": ",".join(
+        [
+            "DocDate",
+            "DocNum",
+            "DocEntry",
+            "CardCode",
+            "DocTotal",
+            "U_voucher_id",
+            "U_total_voucher",
+            "U_total_cash",
+            "U_total_debit",
+            "U_receipt_id",
+        ]
+    ),
+    "bis": ",".join(
+        [
+            "DocDate",
+            "DocNum",
+            "DocEntry",
+            "CardCode",
+            "DocTotal",
+            "U_num_at_card",
+            "U_total_bis",
+            "U_total_cash",
+            "U_total_debit",
+            "U_receipt_id",
+        ]
+    ),
+}
 
 
 def register_routes(app):
 
-    def generate_excel_file(entity, data, filename):
+    def stream_json_array(pages):
         """
-        Generate an Excel file from the provided data and save it locally.
+        Stream fetched pages to the client as a single JSON array.
+
+        The first page is fetched before the response starts so a failing
+        count or first page still returns the usual error object. Later pages
+        are encoded and written as they arrive, keeping memory flat no matter
+        how many records the day has.
 
         Args:
-            entity (str): The type of data ("orders" or "invoices").
-            data (list): A list of dictionaries containing the data to be added to the Excel file.
-            filename (str): The name of the file to save locally.
+            pages (iterator): Pages of records, as from iter_data_in_batches.
 
         Returns:
-            str: The path to the saved Excel file.
+            Response: A chunked JSON response, or the JSON error details.
         """
+        try:
+            first_page = next(pages, [])
+        except FoodbasketError as e:
+            return jsonify(e.error)
 
-        workbook = Workbook()
-        sheet = workbook.active
-        sheet.title = f"{entity.capitalize()} Data"
-
-        if not data:
-            sheet.append(["No data available"])
-        else:
-            if data["error"]:
-                sheet.append([data["details"]])
-            else:
-                if data[0]:
-                    # Extract headers from the keys of the first record
-                    headers = list(data[0].keys())
-                    sheet.append(headers)
-
-                    # Populate rows with data
-                    for record in data:
-                        row = [record.get(header, "") for header in headers]
-                        sheet.append(row)
-                else:
-                    sheet.append(["No data available"])
-
-        # Save the workbook to a file
-        file_path = os.path.join(os.getcwd(), filename)
-        workbook.save(file_path)
-        return file_path
-
-    def fetch_data_in_batches(entity, batch_size, fields=None, filters=None):
+        def generate():
+            yield "["
+            separator = ""
+            try:
+                for page in chain([first_page], pages):
+                    if not page:
+                        continue
+                    # One chunk per page keeps writes few and memory per-page;
+                    # the page is encoded in one call and its brackets dropped
+                    yield separator + app.json.dumps(page)[1:-1]
+                    separator = ","
+            except FoodbasketError as e:
+                # Headers are already sent; abort so the client sees a
+                # truncated body instead of a silently incomplete array
+                print(f"Streaming response aborted: {e.error}")
+                raise
+            yield "]"
+
+        return Response(generate(), mimetype="application/json")
+
+    def export_format():
+        fmt = request.args.get("format", "json")
+        if fmt != "json" and fmt not in EXPORTERS:
+            formats = ", ".join(["json", *EXPORTERS])
+            abort(400, description=f"'format' must be one of: {formats}.")
+        return fmt
+
+    def sales_response(entity, pages, name):
         """
-        Fetch data in batches from the Foodbasket API.
+        Return fetched pages in the format requested by the `format` argument.
+
+        JSON (the default) is streamed as an array and CSV as text, page by
+        page. Excel and Parquet files are written in memory and returned as a
+        download once complete. As for JSON, the first page is fetched before
+        the response starts so early failures return the usual error object.
 
         Args:
-            entity (str): The type of data to fetch ("orders" or "invoices").
-            batch_size (int): Number of records to fetch per batch.
-            fields (str, optional): Comma-separated fields to fetch.
-            filters (dict, optional): Additional filters (e.g., {"date": "2025-01-15"}).
+            entity (str): The type of data ("orders" or "invoices").
+            pages (iterator): Pages of records, as from iter_data_in_batches.
+            name (str): The download file name without extension.
 
         Returns:
-            list: A list of all fetched data.
-            dict: A JSON object with error details if something goes wrong.
+            Response: The records, or the JSON error details.
         """
-        base_url = f"{Config.FOODBASKET_API_URL}/foodbasket/{entity}"
-        count_endpoint = f"{base_url}/count"
+        fmt = export_format()
+        if fmt == "json":
+            return stream_json_array(pages)
 
-        filter_query = ""
-        # Add filters to the count endpoint
-        if filters:
-            filter_query += "&".join(f"{key}={value}" for key, value in filters.items())
-            count_endpoint += f"?{filter_query}"
-
-        # Get the total count
         try:
-            count_response = requests.get(count_endpoint)
-            count_response.raise_for_status()  # Raise an HTTPError for bad responses (4xx and 5xx)
-        except ConnectionError:
-            return {
-                "error": f"Failed to connect to the server while fetching {entity} count",
-                "details": "The server might be unavailable or the connection was refused.",
-            }
-        except Timeout:
-            return {
-                "error": f"Request timed out while fetching {entity} count",
-                "details": "The server did not respond in time. Please try again later.",
-            }
-        except RequestException as e:
-            return {
-                "error": f"An error occurred while fetching {entity} count",
-                "details": str(e),
-            }
-
-        # Check for missing 'data' in the count response
-        count_data = count_response.json()
-        if "data" not in count_data:
-            return {
-                "error": f"Response for {entity} count is missing 'data'",
-                "response": count_data,
-            }
-        total_records = count_data.get("data", 0)
-
-        print(f"{total_records} {entity} records for today")
+            first_page = next(pages, [])
+        except FoodbasketError as e:
+            return jsonify(e.error)
+        records = chain.from_iterable(chain([first_page], pages))
+        exporter = EXPORTERS[fmt]
+        headers = {
+            "Content-Disposition": (
+                f'attachment; filename="{name}{exporter.extension}"'
+            )
+        }
 
-        # Fetch data in batches
-        all_data = []
-        for offset in range(0, total_records, batch_size):
-            data_endpoint = f"{base_url}?maxAllowed={batch_size}&offset={offset}"
-            if fields:
-                data_endpoint += f"&{filter_query}&fields={fields}"
-            else:
-                data_endpoint += f"&{filter_query}"
+        if fmt == "csv":
 
-            try:
-                response = requests.get(data_endpoint)
-                response.raise_for_status()
-            except ConnectionError:
-                return {
-                    "error": f"Failed to connect to the server while fetching {entity} data",
-                    "details": "The server might be unavailable or the connection was refused.",
-                }
-            except Timeout:
-                return {
-                    "error": f"Request timed out while fetching {entity} data",
-                    "details": "The server did not respond in time. Please try again later.",
-                }
-            except RequestException as e:
-                return {
-                    "error": f"An error occurred while fetching {entity} data",
-                    "details": str(e),
-                }
+            def generate():
+                try:
+                    yield from iter_csv(records)
+                except FoodbasketError as e:
+                    print(f"Streaming response aborted: {e.error}")
+                    raise
 
-            # Check for missing 'data' in the data response
-            response_json = response.json()
-            if "data" not in response_json:
-                return {
-                    "error": f"Response for {entity} data is missing 'data'",
-                    "response": response_json,
-                }
-            data_batch = response_json["data"].get(entity.capitalize(), [])
-            all_data.extend(data_batch)
+            return Response(
+                generate(), mimetype=exporter.content_type, headers=headers
+            )
 
-        return all_data
+        buffer = io.BytesIO()
+        try:
+            exporter.write(entity, records, buffer)
+        except FoodbasketError as e:
+            return jsonify(e.error)
+        return Response(
+            buffer.getvalue(), mimetype=exporter.content_type, headers=headers
+        )
 
-    @app.route("/orders-daily-voucher-sales", methods=["GET"])
-    def get_orders_daily_voucher_sales():
+    def daily_sales(entity, payment_method):
         current_date = datetime.now().strftime("%Y-%m-%d")
-        batch_size = 50
-        fields = ",".join(
-            [
-                "DocDate",
-                "DocNum",
-                "DocEntry",
-                "CardCode",
-                "DocTotal",
-                "U_voucher_id",
-                "U_total_voucher",
-                "U_total_cash",
-                "U_total_debit",
-                "U_receipt_id",
-            ]
-        )
         filters = {
             "startDate": current_date,
             "endDate": current_date,
-            "paymentMethods": "voucher",
+            "paymentMethods": payment_method,
         }
-        all_orders = fetch_data_in_batches("orders", batch_size, fields, filters)
-        return jsonify(all_orders)
+        pages = synced_pages(entity, SALES_FIELDS[payment_method], filters)
+        return sales_response(
+            entity, pages, f"{entity}_{payment_method}_{current_date}"
+        )
+
+    def range_sales(entity, payment_method):
+        try:
+            start_date = date.fromisoformat(request.args["startDate"])
+            end_date = date.fromisoformat(request.args["endDate"])
+        except (KeyError, ValueError):
+            abort(400, description="'startDate' and 'endDate' must be YYYY-MM-DD.")
+        if end_date < start_date:
+            abort(400, description="'endDate' must not be before 'startDate'.")
+        if (end_date - start_date).days >= Config.RANGE_MAX_DAYS:
+            abort(
+                400, description=f"Ranges are limited to {Config.RANGE_MAX_DAYS} days."
+            )
+
+        chunk = request.args.get("chunk", "day")
+        if chunk not in CHUNK_DAYS:
+            abort(400, description="'chunk' must be 'day' or 'week'.")
+
+        pages = iter_date_range(
+            entity,
+            SALES_FIELDS[payment_method],
+            {"paymentMethods": payment_method},
+            start_date,
+            end_date,
+            chunk,
+        )
+        return sales_response(
+            entity,
+            pages,
+            f"{entity}_{payment_method}_{start_date}_{end_date}",
+        )
+
+    @app.route("/orders-daily-voucher-sales", methods=["GET"])
+    def get_orders_daily_voucher_sales():
+        return daily_sales("orders", "voucher")
 
     @app.route("/invoices-daily-voucher-sales", methods=["GET"])
     def get_invoices_daily_voucher_sales():
-        current_date = datetime.now().strftime("%Y-%m-%d")
-        batch_size = 50
-        fields = ",".join(
-            [
-                "DocDate",
-                "DocNum",
-                "DocEntry",
-                "CardCode",
-                "DocTotal",
-                "U_voucher_id",
-                "U_total_voucher",
-                "U_total_cash",
-                "U_total_debit",
-                "U_receipt_id",
-            ]
-        )
-        filters = {
-            "startDate": current_date,
-            "endDate": current_date,
-            "paymentMethods": "voucher",
-        }
-        all_invoices = fetch_data_in_batches("invoices", batch_size, fields, filters)
-        return jsonify(all_invoices)
+        return daily_sales("invoices", "voucher")
 
     @app.route("/orders-daily-bis-sales", methods=["GET"])
     def get_orders_daily_bis_sales():
-        current_date = datetime.now().strftime("%Y-%m-%d")
-        batch_size = 50
-        fields = ",".join(
-            [
-                "DocDate",
-                "DocNum",
-                "DocEntry",
-                "CardCode",
-                "DocTotal",
-                "U_num_at_card",
-                "U_total_bis",
-                "U_total_cash",
-                "U_total_debit",
-                "U_receipt_id",
-            ]
-        )
-        filters = {
-            "startDate": current_date,
-            "endDate": current_date,
-            "paymentMethods": "bis",
-        }
-        all_orders = fetch_data_in_batches("orders", batch_size, fields, filters)
-        return jsonify(all_orders)
+        return daily_sales("orders", "bis")
 
     @app.route("/invoices-daily-bis-sales", methods=["GET"])
     def get_invoices_daily_bis_sales():
-        current_date = datetime.now().strftime("%Y-%m-%d")
-        batch_size = 50
-        fields = ",".join(
-            [
-                "DocDate",
-                "DocNum",
-                "DocEntry",
-                "CardCode",
-                "DocTotal",
-                "U_num_at_card",
-                "U_total_bis",
-                "U_total_cash",
-                "U_total_debit",
-                "U_receipt_id",
-            ]
+        return daily_sales("invoices", "bis")
+
+    @app.route("/orders-range-voucher-sales", methods=["GET"])
+    def get_orders_range_voucher_sales():
+        return range_sales("orders", "voucher")
+
+    @app.route("/invoices-range-voucher-sales", methods=["GET"])
+    def get_invoices_range_voucher_sales():
+        return range_sales("invoices", "voucher")
+
+    @app.route("/orders-range-bis-sales", methods=["GET"])
+    def get_orders_range_bis_sales():
+        return range_sales("orders", "bis")
+
+    @app.route("/invoices-range-bis-sales", methods=["GET"])
+    def get_invoices_range_bis_sales():
+        return range_sales("invoices", "bis")
+
+    @app.route("/sales-records/<entity>", methods=["GET"])
+    def get_sales_records(entity):
+        if entity not in ("orders", "invoices"):
+            abort(404)
+
+        try:
+            start_date = date.fromisoformat(request.args["startDate"])
+            end_date = date.fromisoformat(
+                request.args.get("endDate", request.args["startDate"])
+            )
+        except (KeyError, ValueError):
+            abort(400, description="'startDate' and 'endDate' must be YYYY-MM-DD.")
+
+        records = query_sales_records(
+            entity,
+            start_date,
+            end_date,
+            payment_method=request.args.get("paymentMethods"),
+            card_code=request.args.get("cardCode"),
+        )
+        if export_format() == "json":
+            return jsonify(records)
+        return sales_response(
+            entity, iter([records]), f"{entity}_{start_date}_{end_date}"
         )
-        filters = {
-            "startDate": current_date,
-            "endDate": current_date,
-            "paymentMethods": "bis",
-        }
-        all_invoices = fetch_data_in_batches("invoices", batch_size, fields, filters)
-        return jsonify(all_invoices)
+
+    @app.route("/cache", methods=["DELETE"])
+    def clear_cache():
+        entity = request.args.get("entity")
+        removed = invalidate_cache(entity)
+        return jsonify({"message": "Cache invalidated.", "removed": removed})
+
+    def check_report_format(report_format):
+        # None falls back to REPORT_FORMAT
+        if report_format is not None and report_format not in EXPORTERS:
+            formats = ", ".join(EXPORTERS)
+            abort(400, description=f"'report_format' must be one of: {formats}.")
 
     @app.route("/email-recipients", methods=["GET"])
     def get_email_recipients():
         recipients = EmailRecipient.query.all()
-        return jsonify(
-            [
-                {
-                    "id": recipient.id,
-                    "email": recipient.email,
-                    "name": recipient.name,
-                    "active": recipient.active,
-                }
-                for recipient in recipients
-            ]
-        )
+        return jsonify([recipient_store.serialize(r) for r in recipients])
 
     @app.route("/email-recipients", methods=["POST"])
     def add_email_recipient():
@@ -278,25 +279,26 @@ def register_routes(app):
         email = data["email"]
         name = data.get("name")
         active = data.get("active", True)
+        report_format = data.get("report_format")
+        check_report_format(report_format)
 
-        # Check for duplicate email
-        if EmailRecipient.query.filter_by(email=email).first():
-            abort(400, description="Email already exists.")
-
-        new_recipient = EmailRecipient(email=email, name=name, active=active)
+        new_recipient = EmailRecipient(
+            email=email, name=name, active=active, report_format=report_format
+        )
         db.session.add(new_recipient)
-        db.session.commit()
+        # The unique constraint is the duplicate check
+        try:
+            db.session.commit()
+        except IntegrityError:
+            db.session.rollback()
+            abort(400, description="Email already exists.")
+        recipient_store.bump_version()
 
         return (
             jsonify(
                 {
                     "message": "Recipient added successfully.",
-                    "recipient": {
-                        "id": new_recipient.id,
-                        "email": new_recipient.email,
-                        "name": new_recipient.name,
-                        "active": new_recipient.active,
-                    },
+                    "recipient": recipient_store.serialize(new_recipient),
                 }
             ),
             201,
@@ -310,25 +312,21 @@ def register_routes(app):
         recipient.email = data.get("email", recipient.email)
         recipient.name = data.get("name", recipient.name)
         recipient.active = data.get("active", recipient.active)
+        recipient.report_format = data.get("report_format", recipient.report_format)
+        check_report_format(recipient.report_format)
 
-        # Validate email if updated
-        if (
-            "email" in data
-            and EmailRecipient.query.filter_by(email=recipient.email).first()
-        ):
+        # The unique constraint rejects an email that is already taken
+        try:
+            db.session.commit()
+        except IntegrityError:
+            db.session.rollback()
             abort(400, description="Email already exists.")
-
-        db.session.commit()
+        recipient_store.bump_version()
 
         return jsonify(
             {
                 "message": "Recipient updated successfully.",
-                "recipient": {
-                    "id": recipient.id,
-                    "email": recipient.email,
-                    "name": recipient.name,
-                    "active": recipient.active,
-                },
+                "recipient": recipient_store.serialize(recipient),
             }
         )
 
@@ -338,147 +336,80 @@ def register_routes(app):
 
         db.session.delete(recipient)
         db.session.commit()
+        recipient_store.bump_version()
 
         return jsonify({"message": "Recipient deleted successfully."})
 
-    @celery_app.task(bind=True, max_retries=2, default_retry_delay=60 * 30)
-    @app.route("/send-email", methods=["POST"])
-    def send_email(self):
-        try:
-            current_date = (datetime.now() - timedelta(days=1)).strftime("%Y-%m-%d")
-            batch_size = 50
-            entity = "orders"
-
-            order_fields = ",".join(
-                [
-                    "DocDate",
-                    "DocTime",
-                    "CreationDate",
-                    "DocNum",
-                    "DocEntry",
-                    "CardCode",
-                    "DocTotal",
-                    "U_total_cash",
-                    "U_total_debit",
-                    "U_receipt_id",
-                ]
-            )
-
-            # Fetch orders (BIS data)
-            bis_orders = fetch_data_in_batches(
-                entity,
-                batch_size,
-                f"{order_fields},U_num_at_card,U_total_bis",
-                {
-                    "startDate": current_date,
-                    "endDate": current_date,
-                    "paymentMethods": "bis",
-                },
-            )
-
-            # Fetch orders (Voucher data)
-            voucher_orders = fetch_data_in_batches(
-                entity,
-                batch_size,
-                f"{order_fields},U_voucher_id,U_total_voucher",
-                {
-                    "startDate": current_date,
-                    "endDate": current_date,
-                    "paymentMethods": "voucher",
-                },
-            )
+    @app.route("/email-recipients/bulk", methods=["POST"])
+    def bulk_upsert_email_recipients():
+        data = request.get_json(silent=True)
+        if not isinstance(data, list) or not all(
+            isinstance(row, dict) and row.get("email") for row in data
+        ):
+            abort(400, description="Expected a list of objects with an 'email' field.")
 
-            orders_fetch_failed = (
-                bool(bis_orders["error"]) or bool(voucher_orders["error"])
-                if type(bis_orders) == dict or type(voucher_orders) == dict
-                else False
-            )
+        emails = [row["email"] for row in data]
+        if len(set(emails)) != len(emails):
+            abort(400, description="Duplicate emails in request data.")
+        for row in data:
+            check_report_format(row.get("report_format"))
 
-            if orders_fetch_failed:
-                raise Exception(bis_orders["error"])
+        try:
+            created, updated = recipient_store.upsert_recipients(data)
+            db.session.commit()
+        except IntegrityError:
+            # Another request inserted one of the emails concurrently
+            db.session.rollback()
+            abort(409, description="Recipients changed concurrently; retry.")
+        recipient_store.bump_version()
 
-            # Generate Excel files for bis data and vouchers data
-            bis_orders_excel_filename = f"BIS_{entity}_{current_date}.xlsx"
-            voucher_orders_excel_filename = f"Voucher_{entity}_{current_date}.xlsx"
+        return jsonify(
+            {
+                "message": "Recipients saved successfully.",
+                "created": [recipient_store.serialize(r) for r in created],
+                "updated": [recipient_store.serialize(r) for r in updated],
+            }
+        )
 
-            bis_orders_excel_path = generate_excel_file(
-                entity, bis_orders, bis_orders_excel_filename
-            )
-            voucher_orders_excel_path = generate_excel_file(
-                "vouchers", voucher_orders, voucher_orders_excel_filename
-            )
+    def set_recipients_active(active):
+        data = request.get_json(silent=True) or {}
+        ids = data.get("ids") or []
+        emails = data.get("emails") or []
+        if not isinstance(ids, list) or not isinstance(emails, list):
+            abort(400, description="'ids' and 'emails' must be lists.")
+        if not ids and not emails:
+            abort(400, description="Missing 'ids' or 'emails' in request data.")
 
-            # Read files and prepare attachments
-            with open(bis_orders_excel_path, "rb") as f:
-                bis_orders_excel_content = list(f.read())
-            with open(voucher_orders_excel_path, "rb") as f:
-                voucher_orders_excel_content = list(f.read())
+        matched = recipient_store.set_active(active, ids=ids, emails=emails)
+        db.session.commit()
+        recipient_store.bump_version()
 
-            orders_attachment = {
-                "content": bis_orders_excel_content,
-                "filename": bis_orders_excel_filename,
-            }
-            vouchers_attachment = {
-                "content": voucher_orders_excel_content,
-                "filename": voucher_orders_excel_filename,
-            }
+        state = "activated" if active else "deactivated"
+        return jsonify({"message": f"Recipients {state}.", "matched": matched})
 
-            # Fetch email recipients for the CC field
-            recipients = db.session.execute(
-                db.select(EmailRecipient.email).filter_by(active=True)
-            ).all()
-
-            cc_recipients = [row[0] for row in recipients]
-
-            # Email Body (HTML and Plain Text)
-            total_orders = 0 if orders_fetch_failed else len(bis_orders)
-            total_vouchers = 0 if orders_fetch_failed else len(voucher_orders)
-
-            html_body = f"""
-            <p>Goodmorning,</p>
-            <p>Please find the attached reports for today.</p>
-            <p><strong>Summary:</strong></p>
-            <ul>
-                <li>BIS Data Records: {total_orders}</li>
-                <li>Voucher Data Records: {total_vouchers}</li>
-                <li>Fetch Status: {'FAILED' if orders_fetch_failed else 'SUCCESS'}</li>
-            </ul>
-            <p>Kind regards,<br>SynergyDailyBasket</p>
-            """
-
-            plain_text_body = (
-                "Goodmorning,\n\n"
-                "Please find the attached reports for today.\n\n"
-                "Summary:\n"
-                f"- BIS Data Records: {total_orders}\n"
-                f"- Voucher Data Records: {total_vouchers}\n"
-                f"- Fetch Status: {'FAILED' if orders_fetch_failed else 'SUCCESS'}\n\n"
-                "Kind regards,\nSynergyDailyBasket"
-            )
+    @app.route("/email-recipients/activate", methods=["POST"])
+    def activate_email_recipients():
+        return set_recipients_active(True)
 
-            params: resend.Emails.SendParams = {
-                "from": f"SynergyDailyBasket <{Config.FROM_EMAIL}>",
-                "to": [Config.TO_EMAIL],
-                "cc": cc_recipients,
-                "subject": f"BIS and Voucher Reports - {current_date}",
-                "html": html_body,
-                "text": plain_text_body,
-                "attachments": [orders_attachment, vouchers_attachment],
-            }
+    @app.route("/email-recipients/deactivate", methods=["POST"])
+    def deactivate_email_recipients():
+        return set_recipients_active(False)
 
-            # Send the email
-            r = resend.Emails.send(params)
+    @app.route("/send-email", methods=["POST"])
+    def send_email():
+        data = request.get_json(silent=True) or {}
+        # The tasks are imported by the first request that queues one
+        from app.tasks import daily_report
 
-            # Delete the files after sending the email
-            os.remove(bis_orders_excel_path)
-            os.remove(voucher_orders_excel_path)
+        task = daily_report.delay(
+            data.get("reportDate"), force=bool(data.get("force"))
+        )
+        return jsonify({"message": "Daily report queued.", "task_id": task.id}), 202
 
-            return jsonify(r)
-        except Exception as exc:
-            try:
-                self.retry(exc=exc)
-            except MaxRetriesExceededError:
-                print("Max retries exceeded. Send email task failed permanently.")
+    @app.route("/metrics", methods=["GET"])
+    def metrics():
+        body, content_type = render_metrics()
+        return Response(body, content_type=content_type)
 
     @app.route("/", methods=["GET"])
     def index():
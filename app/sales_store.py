@@ -0,0 +1,164 @@
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
+
+from sqlalchemy.dialects import postgresql, sqlite
+
+from app.extensions import db
+from app.models import InvoiceSalesRecord, OrderSalesRecord
+
+MODELS = {"orders": OrderSalesRecord, "invoices": InvoiceSalesRecord}
+
+# Foodbasket field name -> local column name
+FIELD_COLUMNS = {
+    "DocEntry": "doc_entry",
+    "DocNum": "doc_num",
+    "DocDate": "doc_date",
+    "DocTime": "doc_time",
+    "CreationDate": "creation_date",
+    "CardCode": "card_code",
+    "DocTotal": "doc_total",
+    "U_total_bis": "total_bis",
+    "U_total_voucher": "total_voucher",
+    "U_total_cash": "total_cash",
+    "U_total_debit": "total_debit",
+    "U_num_at_card": "num_at_card",
+    "U_voucher_id": "voucher_id",
+    "U_receipt_id": "receipt_id",
+}
+DATE_COLUMNS = {"doc_date", "creation_date"}
+DECIMAL_COLUMNS = {
+    "doc_total",
+    "total_bis",
+    "total_voucher",
+    "total_cash",
+    "total_debit",
+}
+STRING_COLUMNS = {"doc_time", "card_code", "num_at_card", "voucher_id", "receipt_id"}
+
+UPSERT_CHUNK_SIZE = 500
+
+
+def _to_column_value(column, value):
+    # Malformed values are stored as NULL; the local copy must not fail a report
+    if value is None or value == "":
+        return None
+    if column in DATE_COLUMNS:
+        # Foodbasket dates come as "YYYY-MM-DD" or a full ISO timestamp
+        try:
+            return date.fromisoformat(str(value)[:10])
+        except ValueError:
+            return None
+    if column in DECIMAL_COLUMNS:
+        try:
+            return Decimal(str(value))
+        except InvalidOperation:
+            return None
+    if column in STRING_COLUMNS:
+        return str(value)
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _to_row(record, payment_method, synced_at):
+    row = {
+        column: _to_column_value(column, record.get(field))
+        for field, column in FIELD_COLUMNS.items()
+    }
+    row["payment_method"] = payment_method
+    row["synced_at"] = synced_at
+    return row
+
+
+def upsert_sales_records(entity, payment_method, records):
+    """
+    Insert or update fetched sales records in one bulk statement per chunk.
+
+    SQLite and PostgreSQL use a native INSERT ... ON CONFLICT DO UPDATE keyed on
+    (DocEntry, payment method); other databases fall back to session.merge.
+    The caller owns the transaction and must commit.
+
+    Args:
+        entity (str): The type of data ("orders" or "invoices").
+        payment_method (str): The payment method the records were fetched for.
+        records (iterable): Records as returned by the Foodbasket API.
+
+    Returns:
+        int: Number of records written.
+    """
+    model = MODELS[entity]
+    synced_at = datetime.now()
+    # Rows without a usable key or date cannot be stored; checking after
+    # parsing also drops malformed values that would otherwise become NULL
+    rows = [
+        row
+        for row in (_to_row(record, payment_method, synced_at) for record in records)
+        if row["doc_entry"] is not None and row["doc_date"] is not None
+    ]
+    if not rows:
+        return 0
+
+    dialect = db.session.get_bind(mapper=model).dialect.name
+    if dialect not in ("sqlite", "postgresql"):
+        for row in rows:
+            db.session.merge(model(**row))
+        return len(rows)
+
+    insert = sqlite.insert if dialect == "sqlite" else postgresql.insert
+    key_columns = ["doc_entry", "payment_method"]
+    for start in range(0, len(rows), UPSERT_CHUNK_SIZE):
+        statement = insert(model).values(rows[start : start + UPSERT_CHUNK_SIZE])
+        statement = statement.on_conflict_do_update(
+            index_elements=key_columns,
+            set_={
+                column: statement.excluded[column]
+                for column in rows[0]
+                if column not in key_columns
+            },
+        )
+        db.session.execute(statement)
+    return len(rows)
+
+
+def query_sales_records(
+    entity, start_date, end_date, payment_method=None, card_code=None, fields=None
+):
+    """
+    Read stored sales records for a date range.
+
+    Args:
+        entity (str): The type of data ("orders" or "invoices").
+        start_date (date): First DocDate to include.
+        end_date (date): Last DocDate to include.
+        payment_method (str, optional): Only records for this payment method.
+        card_code (str, optional): Only records for this customer.
+        fields (list, optional): Foodbasket field names to return. Defaults to
+            every stored field.
+
+    Returns:
+        list: Records keyed by Foodbasket field names, ordered by DocDate and
+            DocEntry.
+    """
+    model = MODELS[entity]
+    fields = fields or list(FIELD_COLUMNS)
+
+    query = db.select(model).where(model.doc_date.between(start_date, end_date))
+    if payment_method:
+        query = query.where(model.payment_method == payment_method)
+    if card_code:
+        query = query.where(model.card_code == card_code)
+    query = query.order_by(model.doc_date, model.doc_entry)
+
+    records = []
+    for row in db.session.execute(query).scalars():
+        record = {}
+        for field in fields:
+            value = getattr(row, FIELD_COLUMNS[field])
+            if isinstance(value, date):
+                value = value.isoformat()
+            elif isinstance(value, Decimal):
+                value = float(value)
+            record[field] = value
+        records.append(record)
+    return records
@@ -0,0 +1,248 @@
+import threading
+import time
+
+from redis.exceptions import LockError, RedisError
+
+from app import jsonutil
+from app.redis_client import get_redis
+from config import Config
+
+KEY_PREFIX = "singleflight"
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        # Set when a streaming leader stopped before its last page
+        self.abandoned = False
+
+
+_calls = {}
+_calls_lock = threading.Lock()
+
+
+def do(key, fn):
+    """
+    Run `fn` once for all concurrent callers of the same key.
+
+    Within a process, callers that arrive while a call for the key is in
+    flight wait for it and share its result (or its exception). Across
+    gunicorn and Celery workers the leader also holds a Redis lock and
+    publishes its result for SINGLEFLIGHT_RESULT_TTL seconds, so leaders in
+    other processes wait for and reuse it instead of repeating the work. The
+    lock expires after SINGLEFLIGHT_LOCK_TIMEOUT but is extended for as long
+    as the leader is working, so slow work (a rate-limited send) is never
+    started a second time. Without Redis only in-process coalescing applies.
+
+    Args:
+        key (str): Identifies the work, e.g. a cache key for (entity, fields,
+            filters).
+        fn (callable): Produces a JSON-serializable result.
+
+    Returns:
+        object: The result of `fn`, possibly computed by another caller.
+    """
+    with _calls_lock:
+        call = _calls.get(key)
+        leader = call is None
+        if leader:
+            call = _calls[key] = _Call()
+
+    if not leader:
+        call.done.wait()
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+    try:
+        call.result = _do_across_processes(key, fn)
+        return call.result
+    except BaseException as e:
+        call.error = e
+        raise
+    finally:
+        with _calls_lock:
+            del _calls[key]
+        call.done.set()
+
+
+def _keep_alive(lock, stop):
+    # Reset the lock's expiry until the leader is done; a crashed leader stops
+    # extending it and its lock expires within SINGLEFLIGHT_LOCK_TIMEOUT
+    while not stop.wait(Config.SINGLEFLIGHT_LOCK_TIMEOUT / 3):
+        try:
+            lock.reacquire()
+        except (LockError, RedisError):
+            return
+
+
+def _lock(client, key):
+    """Try to take the leader lock for a key; return it, or None if taken."""
+    # Not thread-local: the keep-alive thread extends the leader's lock
+    lock = client.lock(
+        f"{KEY_PREFIX}:{key}:lock",
+        timeout=Config.SINGLEFLIGHT_LOCK_TIMEOUT,
+        thread_local=False,
+    )
+    return lock if lock.acquire(blocking=False) else None
+
+
+def _hold(lock):
+    """Keep a leader lock alive in the background; returns the stop event."""
+    stop = threading.Event()
+    threading.Thread(target=_keep_alive, args=(lock, stop), daemon=True).start()
+    return stop
+
+
+def _release(lock, stop):
+    stop.set()
+    try:
+        lock.release()
+    except (LockError, RedisError):
+        pass
+
+
+def _publish(client, key, result):
+    try:
+        client.set(
+            f"{KEY_PREFIX}:{key}:result",
+            jsonutil.dumps(result),
+            ex=Config.SINGLEFLIGHT_RESULT_TTL,
+        )
+    except (RedisError, TypeError, ValueError):
+        pass
+
+
+def _wait(client, key):
+    """
+    Wait for the leader in another process and return its published result.
+
+    Returns:
+        object | None: The result, or None if the leader failed or its lock
+            expired without publishing one.
+    """
+    lock_key = f"{KEY_PREFIX}:{key}:lock"
+    result_key = f"{KEY_PREFIX}:{key}:result"
+    # The lock stays for as long as the leader is alive, so there is no
+    # deadline here
+    try:
+        while True:
+            raw = client.get(result_key)
+            if raw is not None:
+                return jsonutil.loads(raw)
+            if not client.exists(lock_key):
+                # The leader finished; pick up a result that raced the check
+                raw = client.get(result_key)
+                return None if raw is None else jsonutil.loads(raw)
+            time.sleep(Config.SINGLEFLIGHT_POLL_INTERVAL)
+    except RedisError:
+        return None
+
+
+def _do_across_processes(key, fn):
+    client = get_redis()
+    if client is None:
+        return fn()
+
+    try:
+        lock = _lock(client, key)
+    except RedisError:
+        return fn()
+
+    if lock is not None:
+        stop = _hold(lock)
+        try:
+            result = fn()
+            _publish(client, key, result)
+            return result
+        finally:
+            _release(lock, stop)
+
+    # Another worker is already doing this; wait for it to publish
+    result = _wait(client, key)
+    if result is not None:
+        return result
+    # The leader failed or its lock expired; do the work ourselves
+    return fn()
+
+
+def stream(key, fn):
+    """
+    Coalesce concurrent callers of a paged fetch, streaming to the leader.
+
+    Like do, but `fn` returns an iterator of pages. The leader gets the pages
+    as they arrive, so its response starts with the first page; callers that
+    arrive meanwhile, in this process or in other workers, wait for the
+    leader and get its records as a single page. If the leader stops reading
+    early, the waiting callers fetch for themselves.
+
+    Args:
+        key (str): Identifies the fetch, e.g. a cache key.
+        fn (callable): Returns an iterator of pages of JSON-serializable
+            records.
+
+    Yields:
+        list: Pages of records.
+    """
+    with _calls_lock:
+        call = _calls.get(key)
+        leader = call is None
+        if leader:
+            call = _calls[key] = _Call()
+
+    if not leader:
+        call.done.wait()
+        if call.error is not None:
+            raise call.error
+        if call.abandoned:
+            yield from fn()
+        else:
+            yield call.result
+        return
+
+    records = []
+    try:
+        yield from _stream_across_processes(key, fn, records)
+        call.result = records
+    except GeneratorExit:
+        call.abandoned = True
+        raise
+    except BaseException as e:
+        call.error = e
+        raise
+    finally:
+        with _calls_lock:
+            del _calls[key]
+        call.done.set()
+
+
+def _stream_across_processes(key, fn, records):
+    """Yield the pages of `fn()`, collecting them into `records`."""
+    client = get_redis()
+    lock = None
+    if client is not None:
+        try:
+            lock = _lock(client, key)
+        except RedisError:
+            client = None
+
+    if client is not None and lock is None:
+        # Another worker is already fetching; wait for its records
+        result = _wait(client, key)
+        if result is not None:
+            records.extend(result)
+            yield result
+            return
+
+    stop = _hold(lock) if lock is not None else None
+    try:
+        for page in fn():
+            records.extend(page)
+            yield page
+        if lock is not None:
+            _publish(client, key, records)
+    finally:
+        if lock is not None:
+            _release(lock, stop)
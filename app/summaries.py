@@ -0,0 +1,136 @@
+# pandas and numpy are imported by the functions that use them, so importing
+# the tasks does not load them in processes that never summarize a report
+AMOUNT_COLUMNS = [
+    "DocTotal",
+    "U_total_bis",
+    "U_total_voucher",
+    "U_total_cash",
+    "U_total_debit",
+]
+SUMMARY_COLUMNS = [*AMOUNT_COLUMNS, "CardCode", "DocTime"]
+
+# Customers listed in the email body; the summary sheet lists all of them
+TOP_CUSTOMERS = 10
+
+
+def page_frame(records):
+    """
+    Turn one page of records into a columnar frame of the summarized fields.
+
+    Amounts are parsed to float64 up front so pages can be concatenated and
+    aggregated without touching the records again.
+
+    Args:
+        records (list): The page's records (dicts or compact records).
+
+    Returns:
+        pandas.DataFrame: One row per record with the SUMMARY_COLUMNS.
+    """
+    import pandas as pd
+
+    frame = pd.DataFrame.from_records(records, columns=SUMMARY_COLUMNS)
+    for column in AMOUNT_COLUMNS:
+        frame[column] = pd.to_numeric(frame[column], errors="coerce")
+    return frame
+
+
+def _hours(doc_time):
+    import numpy as np
+    import pandas as pd
+
+    # DocTime comes as HHMM (e.g. 1435) or as a "14:35:00" time string
+    times = doc_time.astype("string")
+    hours = pd.to_numeric(
+        times.str.extract(r"^(\d{1,2}):", expand=False), errors="coerce"
+    )
+    hhmm = pd.to_numeric(times, errors="coerce") // 100
+    hours = hours.fillna(hhmm).to_numpy(dtype=np.float64, na_value=np.nan)
+    hours = np.where((hours >= 0) & (hours < 24), hours, np.nan)
+    return pd.Series(hours, index=doc_time.index)
+
+
+def summarize(frames):
+    """
+    Aggregate report frames into totals, per-customer counts and hourly buckets.
+
+    Args:
+        frames (list): Frames from page_frame.
+
+    Returns:
+        dict: A JSON-serializable summary with "records", "totals" (per amount
+            column), "customers" (record count and DocTotal per CardCode,
+            busiest first) and "hourly" (record count and DocTotal per hour).
+    """
+    import numpy as np
+    import pandas as pd
+
+    if frames:
+        frame = pd.concat(frames, ignore_index=True)
+    else:
+        frame = pd.DataFrame(columns=SUMMARY_COLUMNS)
+
+    amounts = frame[AMOUNT_COLUMNS].astype(np.float64)
+    totals = amounts.sum().round(2)
+
+    customers = (
+        frame.assign(DocTotal=amounts["DocTotal"])
+        .groupby("CardCode", dropna=True)["DocTotal"]
+        .agg(["size", "sum"])
+        .sort_values(["size", "sum"], ascending=False)
+    )
+
+    hourly = (
+        frame.assign(DocTotal=amounts["DocTotal"], hour=_hours(frame["DocTime"]))
+        .dropna(subset=["hour"])
+        .astype({"hour": int})
+        .groupby("hour")["DocTotal"]
+        .agg(["size", "sum"])
+        .reindex(np.arange(24), fill_value=0)
+    )
+
+    return {
+        "records": int(len(frame)),
+        "totals": {column: float(totals[column]) for column in AMOUNT_COLUMNS},
+        "customers": [
+            {
+                "CardCode": str(card_code),
+                "records": int(size),
+                "DocTotal": round(float(total), 2),
+            }
+            for card_code, size, total in customers.itertuples()
+        ],
+        "hourly": [
+            {
+                "hour": int(hour),
+                "records": int(size),
+                "DocTotal": round(float(total), 2),
+            }
+            for hour, size, total in hourly.itertuples()
+        ],
+    }
+
+
+def summary_rows(summary):
+    """
+    Lay out a summary as rows for a worksheet.
+
+    Args:
+        summary (dict): A summary from summarize.
+
+    Returns:
+        list: Rows of cell values.
+    """
+    rows = [["Records", summary["records"]], []]
+    rows += [["Total", "Amount"]]
+    rows += [[column, amount] for column, amount in summary["totals"].items()]
+    rows += [[], ["Hour", "Records", "DocTotal"]]
+    rows += [
+        [f"{bucket['hour']:02d}:00", bucket["records"], bucket["DocTotal"]]
+        for bucket in summary["hourly"]
+    ]
+    rows += [[], ["CardCode", "Records", "DocTotal"]]
+    rows += [
+        [customer["CardCode"], customer["records"], customer["DocTotal"]]
+        for customer in summary["customers"]
+    ]
+    return rows
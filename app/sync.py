@@ -0,0 +1,152 @@
+import time
+from datetime import datetime
+from itertools import chain
+
+from app import cache, singleflight
+from app.foodbasket import count_records, iter_data_in_batches
+from config import Config
+
+HIGH_WATER_MARK_FIELD = "DocEntry"
+
+
+def _snapshot_key(entity, fields, filters):
+    # Lives under the entity's cache prefix so DELETE /cache drops it as well
+    return f"{cache.make_key(entity, fields, filters)}:snapshot"
+
+
+def _is_new(record, high_water_mark):
+    value = record.get(HIGH_WATER_MARK_FIELD)
+    return value is not None and value > high_water_mark
+
+
+def _delta_pages(entity, fields, filters, snapshot, total_records):
+    """
+    Fetch the records added since the snapshot was taken, page by page.
+
+    The fetch starts one record early so the last known record can be checked
+    against the high-water mark. If the boundary record moved, or a new record
+    on the first page is not above the mark, the upstream ordering changed
+    under us and None is returned so the caller falls back to a full fetch.
+
+    Returns:
+        iterator | None: Pages of new records, the first one already checked.
+    """
+    high_water_mark = snapshot["high_water_mark"]
+    pages = iter_data_in_batches(
+        entity,
+        fields=fields,
+        filters=filters,
+        start_offset=snapshot["count"] - 1,
+        total_records=total_records,
+    )
+    first_page = next(pages, [])
+    if (
+        not first_page
+        or first_page[0].get(HIGH_WATER_MARK_FIELD) != high_water_mark
+        or not all(_is_new(record, high_water_mark) for record in first_page[1:])
+    ):
+        pages.close()
+        return None
+    return chain([first_page[1:]], pages)
+
+
+def _sync(entity, fields, filters, key, snapshot):
+    """
+    Bring the stored snapshot for a fetch up to date, yielding its pages.
+
+    Each snapshot keeps the record count and the highest DocEntry seen for its
+    entity, fields and filters (which include the payment method). A later
+    sync asks only for the count; when it has grown, just the new records are
+    fetched and appended, so the cost follows the new orders rather than the
+    day's total. Shrinking counts or a moved boundary trigger a full refetch.
+    The pages are yielded as they arrive and the snapshot is saved once the
+    last one has been read.
+    """
+    read_generation = cache.generation(key)
+    total_records = count_records(entity, filters)
+
+    pages = None
+    if snapshot is not None and snapshot["count"]:
+        if total_records == snapshot["count"]:
+            pages = iter([])
+        elif total_records > snapshot["count"]:
+            pages = _delta_pages(entity, fields, filters, snapshot, total_records)
+
+    if pages is None:
+        records = []
+        pages = iter_data_in_batches(
+            entity, fields=fields, filters=filters, total_records=total_records
+        )
+    else:
+        # Build a new list; readers may still be streaming the old one
+        records = list(snapshot["records"])
+        yield snapshot["records"]
+
+    high_water_mark = records[-1].get(HIGH_WATER_MARK_FIELD) if records else None
+    ordered = True
+    for data_batch in pages:
+        if high_water_mark is not None and not all(
+            _is_new(record, high_water_mark) for record in data_batch
+        ):
+            ordered = False
+        records.extend(data_batch)
+        yield data_batch
+
+    if not ordered:
+        # Too late to fall back for this read; make the next one fetch in full
+        cache.delete(key)
+        return
+
+    cache.set(
+        key,
+        {
+            "count": len(records),
+            "high_water_mark": (
+                records[-1].get(HIGH_WATER_MARK_FIELD) if records else None
+            ),
+            "synced_at": time.time(),
+            "records": records,
+        },
+        Config.SYNC_SNAPSHOT_TTL,
+        read_generation,
+    )
+
+
+def synced_pages(entity, fields, filters):
+    """
+    Stream pages for a daily-sales fetch, syncing incrementally when it can.
+
+    Closed days go through the regular cache. Fetches that reach today and
+    request DocEntry are served from the incremental snapshot, which is only
+    re-synced once it is older than CACHE_TODAY_TTL. A re-sync streams the
+    snapshot's records and then the new pages as they arrive.
+
+    Args:
+        entity (str): The type of data to fetch ("orders" or "invoices").
+        fields (str): Comma-separated fields to fetch; must include DocEntry
+            to sync incrementally.
+        filters (dict): Additional filters.
+
+    Returns:
+        iterator: Pages of records, as from iter_data_in_batches.
+
+    Raises:
+        FoodbasketError: While iterating, if the upstream cannot be read.
+    """
+    end_date = filters.get("endDate")
+    closed_day = end_date and end_date < datetime.now().strftime("%Y-%m-%d")
+    if closed_day or HIGH_WATER_MARK_FIELD not in fields.split(","):
+        return cache.cached_pages(entity, fields, filters)
+
+    key = _snapshot_key(entity, fields, filters)
+    snapshot = cache.get(key)
+    if (
+        snapshot is not None
+        and time.time() - snapshot["synced_at"] < Config.CACHE_TODAY_TTL
+    ):
+        return iter([snapshot["records"]])
+
+    # Callers polling the same fetch at once share a single re-sync
+    return singleflight.stream(
+        key, lambda: _sync(entity, fields, filters, key, snapshot)
+    )
@@ -1,6 +1,54 @@
-from celery import shared_task
+from celery import chord, group, shared_task
+from datetime import datetime, timedelta
+from sqlalchemy.exc import SQLAlchemyError
 import time
 
+from app import (
+    attachments,
+    checkpoints,
+    delivery,
+    exporters,
+    recipients,
+    singleflight,
+    summaries,
+)
+from app.extensions import db
+from app.foodbasket import (
+    FoodbasketError,
+    count_records,
+    filter_payment_method,
+    iter_data_in_batches,
+    union_fields,
+)
+from app.sales_store import upsert_sales_records
+from config import Config
+
+REPORT_ENTITY = "orders"
+
+REPORT_ORDER_FIELDS = ",".join(
+    [
+        "DocDate",
+        "DocTime",
+        "CreationDate",
+        "DocNum",
+        "DocEntry",
+        "CardCode",
+        "DocTotal",
+        "U_total_cash",
+        "U_total_debit",
+        "U_receipt_id",
+    ]
+)
+
+# Fields per payment method, in the order the attachments are sent
+REPORT_FIELDS = {
+    "bis": f"{REPORT_ORDER_FIELDS},U_num_at_card,U_total_bis",
+    "voucher": f"{REPORT_ORDER_FIELDS},U_voucher_id,U_total_voucher",
+}
+
+# Sheet entity and file name prefix per payment method
+REPORT_SHEETS = {"bis": (REPORT_ENTITY, "BIS"), "voucher": ("vouchers", "Voucher")}
+
 
 @shared_task(ignore_result=False, name="hello_world")
 def hello_world():
@@ -8,3 +56,422 @@ def hello_world():
         print(i)
         time.sleep(1)
     print("Hello Celery")
+
+
+def _default_report_date():
+    return (datetime.now() - timedelta(days=1)).strftime("%Y-%m-%d")
+
+
+def _fetch_sources():
+    """
+    The upstream fetches behind the report, keyed by their paymentMethods filter.
+
+    When the upstream can combine payment methods a single source covers all of
+    them; otherwise each payment method is its own source.
+    """
+    if Config.FOODBASKET_COMBINED_PAYMENT_METHODS:
+        return {",".join(REPORT_FIELDS): union_fields(REPORT_FIELDS.values())}
+    return dict(REPORT_FIELDS)
+
+
+def _source_for(method):
+    if Config.FOODBASKET_COMBINED_PAYMENT_METHODS:
+        return ",".join(REPORT_FIELDS)
+    return method
+
+
+def _filters(report_date, source):
+    return {
+        "startDate": report_date,
+        "endDate": report_date,
+        "paymentMethods": source,
+    }
+
+
+def _iter_report_pages(report_date, method):
+    """Yield a payment method's records from the checkpointed pages, per page."""
+    source = _source_for(method)
+    manifest = checkpoints.load(report_date, "manifest", source)
+    for offset in manifest["offsets"]:
+        records = checkpoints.load(report_date, "page", source, str(offset))
+        if source != method:
+            records = list(
+                filter_payment_method(records, method, REPORT_FIELDS[method])
+            )
+        yield records
+
+
+def _iter_report_records(report_date, method):
+    """Yield a payment method's records from the checkpointed pages."""
+    for records in _iter_report_pages(report_date, method):
+        yield from records
+
+
+@shared_task(
+    bind=True, name="daily_report", max_retries=2, default_retry_delay=60 * 30
+)
+def daily_report(self, report_date=None, send=True, force=False):
+    """
+    Start the daily report pipeline for a date (yesterday by default).
+
+    The pipeline is a Celery canvas: a chord of parallel page-range fetches per
+    payment method, then a chord of workbook renders, then the send. Every stage
+    checkpoints its output in Redis, so running it again for the same date
+    skips whatever already completed. When the attachments were pre-built the
+    run goes straight to the send. With `force` the date's checkpoints are
+    dropped first, so the data is fetched again and the report resent.
+    """
+    report_date = report_date or _default_report_date()
+    if force:
+        checkpoints.clear(report_date)
+    if send and checkpoints.exists(report_date, "sent"):
+        return f"Report for {report_date} was already sent."
+
+    if all(
+        checkpoints.exists(report_date, "attachment", method)
+        for method in REPORT_FIELDS
+    ):
+        if not send:
+            return f"Report for {report_date} is already rendered."
+        raise self.replace(send_report.si(report_date))
+
+    fetch_signatures = []
+    try:
+        for source in _fetch_sources():
+            manifest = checkpoints.load(report_date, "manifest", source)
+            if manifest is None:
+                total_records = count_records(
+                    REPORT_ENTITY, _filters(report_date, source)
+                )
+                manifest = {
+                    "total": total_records,
+                    "offsets": list(
+                        range(0, total_records, Config.REPORT_FETCH_RANGE_SIZE)
+                    ),
+                }
+                checkpoints.save(report_date, "manifest", source, value=manifest)
+
+            fetch_signatures += [
+                fetch_report_range.si(report_date, source, offset)
+                for offset in manifest["offsets"]
+                if not checkpoints.exists(report_date, "page", source, str(offset))
+            ]
+    except FoodbasketError as exc:
+        # Retry without force so the retry keeps what this run fetched
+        raise self.retry(exc=exc, args=[report_date, send], kwargs={})
+
+    render = render_reports.si(report_date, send)
+    if not fetch_signatures:
+        raise self.replace(render)
+    raise self.replace(chord(fetch_signatures, render))
+
+
+@shared_task(
+    bind=True,
+    ignore_result=False,
+    name="fetch_report_range",
+    max_retries=5,
+    default_retry_delay=60,
+)
+def fetch_report_range(self, report_date, source, offset):
+    """Fetch one page range of a report source and checkpoint its records."""
+    if checkpoints.exists(report_date, "page", source, str(offset)):
+        return offset
+
+    def fetch_range():
+        manifest = checkpoints.load(report_date, "manifest", source)
+        end = min(offset + Config.REPORT_FETCH_RANGE_SIZE, manifest["total"])
+        records = []
+        for data_batch in iter_data_in_batches(
+            REPORT_ENTITY,
+            fields=_fetch_sources()[source],
+            filters=_filters(report_date, source),
+            start_offset=offset,
+            total_records=end,
+        ):
+            records.extend(data_batch)
+        checkpoints.save(report_date, "page", source, str(offset), value=records)
+        return len(records)
+
+    # A second pipeline for the same date (beat plus a manual /send-email)
+    # waits for this range instead of downloading it again
+    try:
+        singleflight.do(
+            f"daily-report:{report_date}:page:{source}:{offset}", fetch_range
+        )
+    except FoodbasketError as exc:
+        raise self.retry(exc=exc)
+    return offset
+
+
+@shared_task(bind=True, name="render_reports")
+def render_reports(self, report_date, send=True):
+    """Fan out one workbook render per payment method, then send."""
+    renders = [render_report.si(report_date, method) for method in REPORT_FIELDS]
+    if not send:
+        raise self.replace(group(renders))
+    raise self.replace(chord(renders, send_report.si(report_date)))
+
+
+@shared_task(bind=True, name="prewarm_daily_report")
+def prewarm_daily_report(self, report_date=None):
+    """
+    Fetch and render the daily report ahead of the scheduled send.
+
+    Runs overnight from the beat schedule. The rendered attachments stay in the
+    pipeline checkpoints, so the morning daily_report run only has to look up
+    the recipients and call Resend. If pre-warming did not finish, that run
+    falls back to fetching and rendering whatever is missing.
+    """
+    raise self.replace(daily_report.si(report_date, send=False))
+
+
+@shared_task(
+    bind=True,
+    ignore_result=False,
+    name="render_report",
+    max_retries=2,
+    default_retry_delay=60,
+)
+def render_report(self, report_date, method):
+    """
+    Store a payment method's records locally and checkpoint its attachments.
+
+    The attachments are rendered once per export format in use: the default
+    REPORT_FORMAT and any format chosen by an active recipient.
+    """
+    if checkpoints.exists(report_date, "attachment", method):
+        return method
+
+    # Keep a local copy for historical queries and re-sends
+    try:
+        upsert_sales_records(
+            REPORT_ENTITY, method, _iter_report_records(report_date, method)
+        )
+        db.session.commit()
+    except SQLAlchemyError as exc:
+        db.session.rollback()
+        print(f"Failed to store {REPORT_ENTITY} sales records: {exc}")
+
+    # Each page is also kept as a small columnar frame for the summary, which
+    # is aggregated once the rows are written
+    frames = []
+    summary = None
+
+    def collected(pages):
+        for records in pages:
+            frames.append(summaries.page_frame(records))
+            yield from records
+
+    def summary_rows():
+        nonlocal summary
+        summary = summaries.summarize(frames)
+        return summaries.summary_rows(summary)
+
+    formats = [Config.REPORT_FORMAT, *recipients.active_recipients_by_format()]
+    files = {}
+    for fmt in dict.fromkeys(formats):
+        if summary is None:
+            files[fmt] = _render_files(
+                report_date,
+                method,
+                fmt,
+                collected(_iter_report_pages(report_date, method)),
+                summary_rows,
+            )
+        else:
+            # Later formats reuse the summary computed with the first one
+            files[fmt] = _render_files(
+                report_date, method, fmt, summary=_summary_sheet(summary)
+            )
+    checkpoints.save(
+        report_date,
+        "attachment",
+        method,
+        value={
+            "attachments": files,
+            "records": summary["records"],
+            "summary": summary,
+        },
+    )
+    return method
+
+
+def _summary_sheet(summary):
+    """Return the summary sheet callback for an already computed summary."""
+    return lambda: summaries.summary_rows(summary)
+
+
+def _render_files(report_date, method, fmt, records=None, summary=None):
+    """Render a payment method's report in one export format."""
+    if records is None:
+        records = _iter_report_records(report_date, method)
+    sheet_entity, prefix = REPORT_SHEETS[method]
+    return exporters.build_attachments(
+        fmt,
+        sheet_entity,
+        records,
+        f"{prefix}_{REPORT_ENTITY}_{report_date}",
+        summary=summary,
+    )
+
+
+def _summary_lines(method, rendered):
+    """Lines describing a payment method's totals, busiest hour and customers."""
+    summary = rendered.get("summary")
+    if summary is None:
+        return []
+
+    lines = [
+        f"{column}: {amount:,.2f}"
+        for column, amount in summary["totals"].items()
+        if column in ("DocTotal", f"U_total_{method}") or amount
+    ]
+    busiest = max(summary["hourly"], key=lambda bucket: bucket["records"])
+    if busiest["records"]:
+        lines.append(
+            f"Busiest hour: {busiest['hour']:02d}:00 ({busiest['records']} records)"
+        )
+    customers = summary["customers"][: summaries.TOP_CUSTOMERS]
+    if customers:
+        lines.append(
+            "Top customers: "
+            + ", ".join(
+                f"{customer['CardCode']} ({customer['records']})"
+                for customer in customers
+            )
+        )
+    return lines
+
+
+@shared_task(bind=True, name="send_report", max_retries=3, default_retry_delay=60 * 5)
+def send_report(self, report_date):
+    """Send the rendered reports to the active recipients."""
+
+    def send():
+        if checkpoints.exists(report_date, "sent"):
+            return checkpoints.load(report_date, "sent")
+
+        rendered = {
+            method: checkpoints.load(report_date, "attachment", method)
+            for method in REPORT_FIELDS
+        }
+
+        # Email recipients per attachment format, cached until a recipient
+        # changes; TO_EMAIL gets the default format
+        recipients_by_format = recipients.active_recipients_by_format()
+        recipients_by_format.setdefault(Config.REPORT_FORMAT, [])
+
+        # Email Body (HTML and Plain Text)
+        total_orders = rendered["bis"]["records"]
+        total_vouchers = rendered["voucher"]["records"]
+        breakdowns = {
+            REPORT_SHEETS[method][1]: _summary_lines(method, rendered[method])
+            for method in REPORT_FIELDS
+        }
+        html_breakdowns = "".join(
+            f"<p><strong>{label}:</strong></p><ul>"
+            + "".join(f"<li>{line}</li>" for line in lines)
+            + "</ul>"
+            for label, lines in breakdowns.items()
+        )
+        text_breakdowns = "".join(
+            f"{label}:\n" + "".join(f"- {line}\n" for line in lines) + "\n"
+            for label, lines in breakdowns.items()
+        )
+
+        html_body = f"""
+        <p>Goodmorning,</p>
+        <p>Please find the attached reports for today.</p>
+        <p><strong>Summary:</strong></p>
+        <ul>
+            <li>BIS Data Records: {total_orders}</li>
+            <li>Voucher Data Records: {total_vouchers}</li>
+            <li>Fetch Status: SUCCESS</li>
+        </ul>
+        {html_breakdowns}
+        <p>Kind regards,<br>SynergyDailyBasket</p>
+        """
+
+        plain_text_body = (
+            "Goodmorning,\n\n"
+            "Please find the attached reports for today.\n\n"
+            "Summary:\n"
+            f"- BIS Data Records: {total_orders}\n"
+            f"- Voucher Data Records: {total_vouchers}\n"
+            "- Fetch Status: SUCCESS\n\n"
+            f"{text_breakdowns}"
+            "Kind regards,\nSynergyDailyBasket"
+        )
+
+        subject = f"BIS and Voucher Reports - {report_date}"
+        messages = {}
+        for fmt, emails in recipients_by_format.items():
+            # Built once by render_report (or here, for a format chosen since),
+            # packaged (zipped and split to the email size budget) and shared
+            # by every message in the format
+            files = []
+            for method in REPORT_FIELDS:
+                rendered_files = rendered[method]["attachments"].get(fmt)
+                if rendered_files is None:
+                    rendered_files = _render_files(
+                        report_date,
+                        method,
+                        fmt,
+                        summary=_summary_sheet(rendered[method]["summary"]),
+                    )
+                files += rendered_files
+            packages = attachments.package(
+                files, f"Reports_{REPORT_ENTITY}_{report_date}.zip"
+            )
+
+            default_format = fmt == Config.REPORT_FORMAT
+            for number, package in enumerate(packages, start=1):
+                part = f":{number}" if len(packages) > 1 else ""
+                params = {
+                    "from": f"SynergyDailyBasket <{Config.FROM_EMAIL}>",
+                    "subject": (
+                        f"{subject} ({number}/{len(packages)})" if part else subject
+                    ),
+                    "html": html_body,
+                    "text": plain_text_body,
+                    "attachments": package,
+                }
+                if Config.REPORT_DELIVERY == "individual":
+                    for email in dict.fromkeys(
+                        [Config.TO_EMAIL, *emails] if default_format else emails
+                    ):
+                        messages[f"{email}{part}"] = {**params, "to": [email]}
+                elif default_format:
+                    messages[f"report{part}"] = {
+                        **params,
+                        "to": [Config.TO_EMAIL],
+                        "cc": emails,
+                    }
+                elif emails:
+                    messages[f"report-{fmt}{part}"] = {**params, "to": emails}
+
+        # Per-message status survives retries, so only failed messages are resent
+        progress = checkpoints.load(report_date, "delivery") or {}
+
+        def record(message_id, result):
+            progress[message_id] = result
+            checkpoints.save(report_date, "delivery", value=progress)
+
+        status = delivery.deliver(messages, progress, on_result=record)
+        failed = [
+            message_id
+            for message_id in messages
+            if status.get(message_id, {}).get("status") != "sent"
+        ]
+        if failed:
+            raise delivery.DeliveryError(failed)
+
+        checkpoints.save(report_date, "sent", value=status)
+        return status
+
+    # Overlapping pipelines for the same date must not email twice
+    try:
+        return singleflight.do(f"daily-report:{report_date}:send", send)
+    except Exception as exc:
+        raise self.retry(exc=exc)
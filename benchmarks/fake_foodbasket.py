@@ -0,0 +1,177 @@
+"""
+A local stand-in for the Foodbasket API.
+
+Serves `/foodbasket/{entity}/count` and the paged `/foodbasket/{entity}`
+endpoint with generated records, so the fetcher and the report pipeline can
+be benchmarked without touching the live API. Records are derived from their
+offset, so any page can be served without keeping the data set in memory.
+
+Run it on its own to point a development app at it:
+
+    python -m benchmarks.fake_foodbasket --records 10000 --latency 0.05
+"""
+
+import argparse
+import json
+import random
+import time
+from datetime import date
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+DEFAULT_PAYMENT_METHODS = ["bis", "voucher"]
+
+
+def make_record(index, payment_method, day):
+    """
+    Build the record at an offset, with every field the reports request.
+
+    Args:
+        index (int): The record offset.
+        payment_method (str): The payment method the record was paid with.
+        day (str): The document date ("YYYY-MM-DD").
+
+    Returns:
+        dict: The record.
+    """
+    total = round(10 + (index * 7919 % 50000) / 100, 2)
+    return {
+        "DocDate": f"{day}T00:00:00Z",
+        "DocTime": f"{8 + index % 12:02d}{index % 60:02d}",
+        "CreationDate": f"{day}T00:00:00Z",
+        "DocNum": 100000 + index,
+        "DocEntry": 500000 + index,
+        "CardCode": f"C{index % 2500:05d}",
+        "DocTotal": total,
+        "U_total_cash": 0,
+        "U_total_debit": 0,
+        "U_total_bis": total if payment_method == "bis" else 0,
+        "U_total_voucher": total if payment_method == "voucher" else 0,
+        "U_receipt_id": f"R{index:08d}",
+        "U_num_at_card": f"{index % 10000:04d}" if payment_method == "bis" else "",
+        "U_voucher_id": f"V{index:08d}" if payment_method == "voucher" else "",
+    }
+
+
+class FakeFoodbasketHandler(BaseHTTPRequestHandler):
+    """Request handler; the settings live on the server instance."""
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status, body):
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self):
+        server = self.server
+        url = urlsplit(self.path)
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        parts = url.path.strip("/").split("/")
+        if len(parts) < 2 or parts[0] != "foodbasket":
+            self._send_json(404, {"error": "Not found"})
+            return
+
+        if server.latency:
+            time.sleep(server.latency)
+        if server.error_rate and random.random() < server.error_rate:
+            self._send_json(503, {"error": "Injected failure"})
+            return
+
+        if len(parts) == 3 and parts[2] == "count":
+            self._send_json(200, {"data": server.records})
+            return
+
+        entity = parts[1]
+        offset = int(query.get("offset", 0))
+        size = int(query.get("maxAllowed", 50))
+        if server.max_page_size:
+            size = min(size, server.max_page_size)
+        methods = query.get("paymentMethods")
+        methods = methods.split(",") if methods else DEFAULT_PAYMENT_METHODS
+        fields = query.get("fields")
+        fields = fields.split(",") if fields else None
+        day = query.get("startDate") or date.today().isoformat()
+
+        records = []
+        for index in range(offset, min(offset + size, server.records)):
+            record = make_record(index, methods[index % len(methods)], day)
+            if fields:
+                record = {field: record.get(field) for field in fields}
+            records.append(record)
+        self._send_json(200, {"data": {entity.capitalize(): records}})
+
+
+class FakeFoodbasket(ThreadingHTTPServer):
+    """
+    The stand-in server.
+
+    Args:
+        records (int): Records matching every query; with several comma-separated
+            paymentMethods the records alternate between them.
+        latency (float, optional): Seconds added to every request.
+        error_rate (float, optional): Fraction of requests answered with a 503.
+        max_page_size (int, optional): Cap on maxAllowed, as some upstream
+            deployments enforce.
+        host (str, optional): Interface to bind.
+        port (int, optional): Port to bind; 0 picks a free one.
+    """
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        records,
+        latency=0.0,
+        error_rate=0.0,
+        max_page_size=None,
+        host="127.0.0.1",
+        port=0,
+    ):
+        super().__init__((host, port), FakeFoodbasketHandler)
+        self.records = records
+        self.latency = latency
+        self.error_rate = error_rate
+        self.max_page_size = max_page_size
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+
+def serve(ready, records, latency, error_rate, max_page_size):
+    """Run a server until terminated, reporting its URL through `ready`."""
+    server = FakeFoodbasket(records, latency, error_rate, max_page_size)
+    ready.put(server.url)
+    server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--records", type=int, default=10000)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--max-page-size", type=int)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    args = parser.parse_args()
+
+    server = FakeFoodbasket(
+        args.records,
+        args.latency,
+        args.error_rate,
+        args.max_page_size,
+        args.host,
+        args.port,
+    )
+    print(f"Fake Foodbasket API serving {args.records} records on {server.url}")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
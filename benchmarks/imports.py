@@ -0,0 +1,94 @@
+"""
+Benchmark the import time of the application entry points.
+
+Each target is imported in a fresh interpreter with `python -X importtime`, so
+nothing is shared between runs. The wall time covers interpreter start-up and
+the import; the cumulative import time of the target and its heaviest
+third-party dependencies are read from the importtime report.
+
+    python -m benchmarks.imports --repeat 5
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+# Module imported by each entry point: the web app, the worker and beat
+TARGETS = {
+    "web": "run",
+    "worker": "app.make_celery",
+    "beat": "app.beat",
+    "tasks": "app.tasks",
+}
+# Dependencies that should only be loaded on first use
+HEAVY_MODULES = ["openpyxl", "pandas", "pyarrow", "resend", "alembic"]
+
+
+def import_time(module):
+    """
+    Import `module` in a fresh interpreter and time it.
+
+    Returns:
+        tuple: The wall time in seconds and a dict of cumulative import times
+            in seconds for `module` and every loaded HEAVY_MODULES entry.
+    """
+    started = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        env=os.environ,
+    )
+    elapsed = time.perf_counter() - started
+    if result.returncode:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+
+    cumulative = {}
+    for line in result.stderr.splitlines():
+        # "import time: self [us] | cumulative | imported package"
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, total, name = line.split("|")
+        name = name.strip()
+        if name == module or name in HEAVY_MODULES:
+            cumulative[name] = int(total) / 1e6
+    return elapsed, cumulative
+
+
+def report(name, module, runs):
+    walls = [wall for wall, _ in runs]
+    imported = runs[-1][1]
+    heavy = [dependency for dependency in HEAVY_MODULES if dependency in imported]
+    print(
+        f"{name:<7} {module:<16} {statistics.median(walls):>8.3f} s  "
+        f"{imported.get(module, 0):>8.3f} s  {', '.join(heavy) or '-'}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--only",
+        default=",".join(TARGETS),
+        help=f"Comma-separated entry points to time ({', '.join(TARGETS)}).",
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=3, help="Runs per entry point (median)."
+    )
+    args = parser.parse_args()
+
+    # Creating the app must not need a database server
+    os.environ.setdefault("DATABASE_URI", "sqlite://")
+
+    print(f"{'entry':<7} {'module':<16} {'wall':>10}  {'import':>10}  heavy modules")
+    for name in args.only.split(","):
+        module = TARGETS[name]
+        runs = [import_time(module) for _ in range(args.repeat)]
+        report(name, module, runs)
+
+
+if __name__ == "__main__":
+    main()
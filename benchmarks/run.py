@@ -0,0 +1,225 @@
+"""
+Benchmark the fetcher, the Excel export and the daily report send path.
+
+Each benchmark runs against a local fake Foodbasket API (see
+benchmarks/fake_foodbasket.py) in a separate process, so its allocations do not
+count towards the measured peak memory. Resend is stubbed; the send benchmark
+needs a reachable Redis for the pipeline checkpoints and uses an in-memory
+SQLite database for the recipients and stored sales records. The benchmarks
+keep their state (page sizes, caches, checkpoints) in their own Redis database,
+--redis-url, never in the app's REDIS_URL.
+
+    python -m benchmarks.run --records 1000,10000,100000 --latency 0.02
+"""
+
+import argparse
+import io
+import multiprocessing
+import os
+import time
+import tracemalloc
+
+from benchmarks.fake_foodbasket import make_record, serve
+
+BENCHMARKS = ["fetch", "excel", "send"]
+BENCHMARK_DATE = "2000-01-01"
+# A database of the local Redis that the app does not use
+BENCHMARK_REDIS_URL = "redis://localhost:6379/15"
+
+
+def measure(fn):
+    """
+    Run `fn` once, tracking wall time and peak traced memory.
+
+    Returns:
+        tuple: The result of `fn`, the wall time in seconds and the peak memory
+            in bytes.
+    """
+    tracemalloc.start()
+    started = time.perf_counter()
+    try:
+        result = fn()
+    finally:
+        elapsed = time.perf_counter() - started
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def start_server(records, latency, error_rate, max_page_size):
+    ready = multiprocessing.Queue()
+    process = multiprocessing.Process(
+        target=serve,
+        args=(ready, records, latency, error_rate, max_page_size),
+        daemon=True,
+    )
+    process.start()
+    return process, ready.get(timeout=10)
+
+
+def bench_fetch(records, args):
+    from app.foodbasket import fetch_data_in_batches
+    from app.tasks import REPORT_FIELDS
+
+    def fetch():
+        data = fetch_data_in_batches(
+            "orders",
+            batch_size=args.batch_size,
+            fields=REPORT_FIELDS["bis"],
+            filters={
+                "startDate": BENCHMARK_DATE,
+                "endDate": BENCHMARK_DATE,
+                "paymentMethods": "bis",
+            },
+            concurrency=args.concurrency,
+        )
+        if isinstance(data, dict):
+            raise RuntimeError(data["error"])
+        return len(data)
+
+    return measure(fetch)
+
+
+def bench_excel(records, args):
+    from app.reports import generate_excel_file
+
+    # Built up front so only the workbook counts towards the peak
+    data = [make_record(index, "bis", BENCHMARK_DATE) for index in range(records)]
+
+    def export():
+        generate_excel_file("orders", data, io.BytesIO())
+        return len(data)
+
+    return measure(export)
+
+
+def bench_send(records, args):
+    import resend
+    from redis.exceptions import RedisError
+
+    from app import checkpoints, tasks
+    from app.redis_client import get_redis
+    from config import Config
+
+    client = get_redis()
+    try:
+        if client is None or not client.ping():
+            raise RedisError
+    except RedisError:
+        return None
+
+    def send():
+        # Same stages as the daily_report canvas, run inline in this process
+        for source in tasks._fetch_sources():
+            total = tasks.count_records(
+                tasks.REPORT_ENTITY, tasks._filters(BENCHMARK_DATE, source)
+            )
+            offsets = list(range(0, total, Config.REPORT_FETCH_RANGE_SIZE))
+            checkpoints.save(
+                BENCHMARK_DATE,
+                "manifest",
+                source,
+                value={"total": total, "offsets": offsets},
+            )
+            for offset in offsets:
+                tasks.fetch_report_range(BENCHMARK_DATE, source, offset)
+        for method in tasks.REPORT_FIELDS:
+            tasks.render_report(BENCHMARK_DATE, method)
+        tasks.send_report(BENCHMARK_DATE)
+        return records * len(tasks.REPORT_FIELDS)
+
+    original_send = resend.Emails.send
+    resend.Emails.send = lambda params: {"id": "benchmark"}
+    checkpoints.clear(BENCHMARK_DATE)
+    try:
+        return measure(send)
+    finally:
+        resend.Emails.send = original_send
+        checkpoints.clear(BENCHMARK_DATE)
+
+
+def create_benchmark_app():
+    from app import create_app
+    from app.extensions import db
+    from app.models import EmailRecipient
+
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        db.session.add_all(
+            EmailRecipient(email=f"recipient{index}@example.com", name="Benchmark")
+            for index in range(5)
+        )
+        db.session.commit()
+    return app
+
+
+def report(name, records, measured):
+    if measured is None:
+        print(f"{name:<6} {records:>8}  skipped (Redis is not reachable)")
+        return
+    processed, elapsed, peak = measured
+    print(
+        f"{name:<6} {records:>8}  {elapsed:>8.2f} s  "
+        f"{processed / elapsed:>10.0f} records/s  {peak / 2**20:>8.1f} MiB peak"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--records",
+        default="1000,10000,100000",
+        help="Comma-separated record counts to benchmark.",
+    )
+    parser.add_argument(
+        "--only",
+        default=",".join(BENCHMARKS),
+        help=f"Comma-separated benchmarks to run ({', '.join(BENCHMARKS)}).",
+    )
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--max-page-size", type=int)
+    parser.add_argument("--batch-size", type=int)
+    parser.add_argument("--concurrency", type=int)
+    parser.add_argument(
+        "--redis-url",
+        default=BENCHMARK_REDIS_URL,
+        help="Redis for the benchmark's page sizes, caches and checkpoints.",
+    )
+    args = parser.parse_args()
+
+    # Configuration is read at import time, so set it before importing the app
+    os.environ["DATABASE_URI"] = "sqlite://"
+    # A capped --max-page-size run must not change the app's remembered sizes
+    os.environ["REDIS_URL"] = args.redis_url
+    os.environ.setdefault("FROM_EMAIL", "benchmark@example.com")
+    os.environ.setdefault("TO_EMAIL", "benchmark@example.com")
+    from config import Config
+
+    create_benchmark_app()
+    only = args.only.split(",")
+
+    print(
+        f"{'bench':<6} {'records':>8}  {'wall':>10}  {'throughput':>19}  "
+        f"{'memory':>13}"
+    )
+    for records in [int(count) for count in args.records.split(",")]:
+        process, url = start_server(
+            records, args.latency, args.error_rate, args.max_page_size
+        )
+        Config.FOODBASKET_API_URL = url
+        try:
+            if "fetch" in only:
+                report("fetch", records, bench_fetch(records, args))
+            if "excel" in only:
+                report("excel", records, bench_excel(records, args))
+            if "send" in only:
+                report("send", records, bench_send(records, args))
+        finally:
+            process.terminate()
+            process.join()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,65 @@
 import os
 
 
+def env_flag(name):
+    """Read a boolean setting; only "1", "true", "yes" and "on" enable it."""
+    return os.environ.get(name, "").strip().lower() in ("1", "true", "yes", "on")
+
+
 class Config:
     DEBUG = os.environ.get("DEBUG", False)
     SECRET_KEY = os.environ.get("SECRET_KEY", "your-secret-key")
     SQLALCHEMY_DATABASE_URI = os.environ.get("DATABASE_URI", "sqlite:///db.sqlite3")
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     FOODBASKET_API_URL = os.environ.get("FOODBASKET_API_URL")
+    FOODBASKET_FETCH_CONCURRENCY = int(
+        os.environ.get("FOODBASKET_FETCH_CONCURRENCY", 4)
+    )
+    FOODBASKET_POOL_CONNECTIONS = int(
+        os.environ.get("FOODBASKET_POOL_CONNECTIONS", 2)
+    )
+    FOODBASKET_POOL_MAXSIZE = int(os.environ.get("FOODBASKET_POOL_MAXSIZE", 8))
+    FOODBASKET_CONNECT_TIMEOUT = float(
+        os.environ.get("FOODBASKET_CONNECT_TIMEOUT", 5)
+    )
+    FOODBASKET_READ_TIMEOUT = float(os.environ.get("FOODBASKET_READ_TIMEOUT", 60))
+    FOODBASKET_MAX_RETRIES = int(os.environ.get("FOODBASKET_MAX_RETRIES", 4))
+    FOODBASKET_RETRY_BACKOFF = float(os.environ.get("FOODBASKET_RETRY_BACKOFF", 0.5))
+    FOODBASKET_RETRY_MAX_DELAY = float(
+        os.environ.get("FOODBASKET_RETRY_MAX_DELAY", 30)
+    )
+    FOODBASKET_BREAKER_THRESHOLD = int(
+        os.environ.get("FOODBASKET_BREAKER_THRESHOLD", 5)
+    )
+    FOODBASKET_BREAKER_RESET_TIMEOUT = float(
+        os.environ.get("FOODBASKET_BREAKER_RESET_TIMEOUT", 60)
+    )
+    FOODBASKET_MIN_PAGE_SIZE = int(os.environ.get("FOODBASKET_MIN_PAGE_SIZE", 50))
+    FOODBASKET_MAX_PAGE_SIZE = int(os.environ.get("FOODBASKET_MAX_PAGE_SIZE", 1000))
+    FOODBASKET_TARGET_PAGE_SECONDS = float(
+        os.environ.get("FOODBASKET_TARGET_PAGE_SECONDS", 2)
+    )
+    FOODBASKET_MAX_PAGE_BYTES = int(
+        os.environ.get("FOODBASKET_MAX_PAGE_BYTES", 2 * 1024 * 1024)
+    )
+    FOODBASKET_RANGE_CONCURRENCY = int(
+        os.environ.get("FOODBASKET_RANGE_CONCURRENCY", 4)
+    )
+    RANGE_MAX_DAYS = int(os.environ.get("RANGE_MAX_DAYS", 93))
+    # Set when the upstream accepts several comma-separated paymentMethods at once
+    FOODBASKET_COMBINED_PAYMENT_METHODS = env_flag(
+        "FOODBASKET_COMBINED_PAYMENT_METHODS"
+    )
+    # Store fetched records as compact read-only mappings instead of dicts
+    FOODBASKET_COMPACT_RECORDS = env_flag("FOODBASKET_COMPACT_RECORDS")
+    # "orjson" (when installed) or "json" for decoding pages and encoding responses
+    JSON_BACKEND = os.environ.get("JSON_BACKEND", "orjson")
     RESEND_API_KEY = os.environ.get("RESEND_API_KEY")
+    # Resend's default limit is 2 requests per second per team
+    RESEND_RATE_LIMIT = float(os.environ.get("RESEND_RATE_LIMIT", 2))
+    RESEND_SEND_CONCURRENCY = int(os.environ.get("RESEND_SEND_CONCURRENCY", 4))
+    # "cc": one email to TO_EMAIL with the recipients in CC; "individual": one each
+    REPORT_DELIVERY = os.environ.get("REPORT_DELIVERY", "cc")
     FROM_EMAIL = os.environ.get("FROM_EMAIL")
     TO_EMAIL = os.environ.get("TO_EMAIL")
     FLASK_RUN_PORT = os.environ.get("FLASK_RUN_PORT", 7000)
@@ -19,3 +71,49 @@ class Config:
     )
     CELERY_TIMEZONE = "America/Paramaribo"
     CELERY_ENABLE_UTC = True
+
+    # Daily report pipeline: records per fetch task and checkpoint lifetime
+    REPORT_FETCH_RANGE_SIZE = int(os.environ.get("REPORT_FETCH_RANGE_SIZE", 2000))
+    REPORT_CHECKPOINT_TTL = int(
+        os.environ.get("REPORT_CHECKPOINT_TTL", 60 * 60 * 24 * 3)
+    )
+    # Hour at which yesterday's report is fetched and rendered ahead of the send
+    REPORT_PREWARM_HOUR = int(os.environ.get("REPORT_PREWARM_HOUR", 3))
+    # Default export format of the report attachments ("xlsx", "csv", "parquet")
+    REPORT_FORMAT = os.environ.get("REPORT_FORMAT", "xlsx")
+    # Report attachments: rows per sheet and per file (0 never splits files),
+    # email size budget and when zipping is worth it
+    REPORT_MAX_SHEET_ROWS = int(os.environ.get("REPORT_MAX_SHEET_ROWS", 1000000))
+    REPORT_MAX_FILE_ROWS = int(os.environ.get("REPORT_MAX_FILE_ROWS", 250000))
+    REPORT_MAX_EMAIL_BYTES = int(
+        os.environ.get("REPORT_MAX_EMAIL_BYTES", 25 * 1024 * 1024)
+    )
+    REPORT_COMPRESS_MIN_BYTES = int(
+        os.environ.get("REPORT_COMPRESS_MIN_BYTES", 1024 * 1024)
+    )
+    REPORT_MIN_COMPRESSION_SAVING = float(
+        os.environ.get("REPORT_MIN_COMPRESSION_SAVING", 0.1)
+    )
+
+    # Application state (page sizes, caches) lives on the broker's Redis by default;
+    # an empty value (as passed through by an env_file) also means the default
+    REDIS_URL = os.environ.get("REDIS_URL") or CELERY_BROKER_URL
+    REDIS_SOCKET_TIMEOUT = float(os.environ.get("REDIS_SOCKET_TIMEOUT", 2))
+
+    # Daily-sales cache: closed days never expire, today's data uses a short TTL
+    # Serialized size of the in-memory tier, per process
+    CACHE_MAX_BYTES = int(os.environ.get("CACHE_MAX_BYTES", 64 * 1024 * 1024))
+    CACHE_TODAY_TTL = int(os.environ.get("CACHE_TODAY_TTL", 60))
+    CACHE_REDIS_ENABLED = env_flag("CACHE_REDIS_ENABLED")
+    # Intraday snapshots only need to outlive the day they track
+    SYNC_SNAPSHOT_TTL = int(os.environ.get("SYNC_SNAPSHOT_TTL", 60 * 60 * 48))
+
+    # Coalescing of identical in-flight fetches across workers
+    SINGLEFLIGHT_LOCK_TIMEOUT = int(os.environ.get("SINGLEFLIGHT_LOCK_TIMEOUT", 300))
+    SINGLEFLIGHT_RESULT_TTL = int(os.environ.get("SINGLEFLIGHT_RESULT_TTL", 10))
+    SINGLEFLIGHT_POLL_INTERVAL = float(
+        os.environ.get("SINGLEFLIGHT_POLL_INTERVAL", 0.2)
+    )
+
+    # Cached active-recipient lists are keyed by version; the TTL only cleans up
+    RECIPIENTS_CACHE_TTL = int(os.environ.get("RECIPIENTS_CACHE_TTL", 60 * 60 * 24))
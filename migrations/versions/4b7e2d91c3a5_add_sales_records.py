@@ -0,0 +1,61 @@
+"""Add order and invoice sales records
+
+Revision ID: 4b7e2d91c3a5
+Revises: ee0d0cfe9f9e
+Create Date: 2025-02-03 09:12:27.518304
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4b7e2d91c3a5'
+down_revision = 'ee0d0cfe9f9e'
+branch_labels = None
+depends_on = None
+
+
+def _create_sales_record_table(table_name):
+    op.create_table(table_name,
+    sa.Column('doc_entry', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('payment_method', sa.String(length=20), nullable=False),
+    sa.Column('doc_num', sa.Integer(), nullable=True),
+    sa.Column('doc_date', sa.Date(), nullable=False),
+    sa.Column('doc_time', sa.String(length=20), nullable=True),
+    sa.Column('creation_date', sa.Date(), nullable=True),
+    sa.Column('card_code', sa.String(length=50), nullable=True),
+    sa.Column('doc_total', sa.Numeric(precision=19, scale=6), nullable=True),
+    sa.Column('total_bis', sa.Numeric(precision=19, scale=6), nullable=True),
+    sa.Column('total_voucher', sa.Numeric(precision=19, scale=6), nullable=True),
+    sa.Column('total_cash', sa.Numeric(precision=19, scale=6), nullable=True),
+    sa.Column('total_debit', sa.Numeric(precision=19, scale=6), nullable=True),
+    sa.Column('num_at_card', sa.String(length=100), nullable=True),
+    sa.Column('voucher_id', sa.String(length=100), nullable=True),
+    sa.Column('receipt_id', sa.String(length=100), nullable=True),
+    sa.Column('synced_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('doc_entry', 'payment_method')
+    )
+    with op.batch_alter_table(table_name, schema=None) as batch_op:
+        batch_op.create_index(batch_op.f(f'ix_{table_name}_card_code'), ['card_code'], unique=False)
+        batch_op.create_index(batch_op.f(f'ix_{table_name}_doc_date'), ['doc_date'], unique=False)
+        batch_op.create_index(batch_op.f(f'ix_{table_name}_payment_method'), ['payment_method'], unique=False)
+
+
+def _drop_sales_record_table(table_name):
+    with op.batch_alter_table(table_name, schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f(f'ix_{table_name}_payment_method'))
+        batch_op.drop_index(batch_op.f(f'ix_{table_name}_doc_date'))
+        batch_op.drop_index(batch_op.f(f'ix_{table_name}_card_code'))
+
+    op.drop_table(table_name)
+
+
+def upgrade():
+    _create_sales_record_table('order_sales_record')
+    _create_sales_record_table('invoice_sales_record')
+
+
+def downgrade():
+    _drop_sales_record_table('invoice_sales_record')
+    _drop_sales_record_table('order_sales_record')